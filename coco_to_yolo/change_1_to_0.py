@@ -20,6 +20,28 @@ def modify_txt_files(folder_path):
             with open(file_path, 'w', encoding='utf-8') as file:
                 file.writelines(modified_lines)
 
-# 指定文件夹路径
-folder_path = './sar_data/HRSID_jpg/yolo_file/Dataset/labels/val'
-modify_txt_files(folder_path)
+
+# 按映射修改类别id，例如 {1: 0} 或多类别时 {1: 0, 2: 1, ...}，不在映射中的行保持不变
+def remap_txt_files(folder_path, mapping):
+    for filename in os.listdir(folder_path):
+        if not filename.endswith(".txt") or filename == "classes.txt":
+            continue
+        file_path = os.path.join(folder_path, filename)
+        with open(file_path, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+
+        modified_lines = []
+        for line in lines:
+            parts = line.split(maxsplit=1)
+            if parts and parts[0].isdigit() and int(parts[0]) in mapping:
+                line = str(mapping[int(parts[0])]) + line[len(parts[0]):]
+            modified_lines.append(line)
+
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.writelines(modified_lines)
+
+
+if __name__ == '__main__':
+    # 指定文件夹路径
+    folder_path = './sar_data/HRSID_jpg/yolo_file/Dataset/labels/val'
+    modify_txt_files(folder_path)
@@ -0,0 +1,159 @@
+import os
+import json
+import random
+import argparse
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from yolo_to_coco import JsonArrayWriter
+from divide import split_by_index
+
+"""
+一次读取coco标注文件，同时写出train/val/test等多个划分的json
+    - 划分方式：random（按seed随机）或 stratified（按类别数量分层，保证每个类别在各划分中的比例接近）
+    - 所有划分的json在同一遍遍历中边读边写，划分完成后只保留 image_id->划分 的索引
+    - 同时写出索引文件 {name}_split_index.txt（image_id  file_name  split），
+      传入 --yolo-images/--yolo-labels 时按同一份划分复制yolo格式的图片和标签，两种格式的划分完全一致
+"""
+
+
+def assign_random(image_ids, splits, ratios, seed):
+    ids = list(image_ids)
+    random.Random(seed).shuffle(ids)
+    assignment, start = {}, 0
+    total = sum(ratios)
+    for i, (split, ratio) in enumerate(zip(splits, ratios)):
+        end = len(ids) if i == len(splits) - 1 else start + int(round(ratio / total * len(ids)))
+        for img_id in ids[start:end]:
+            assignment[img_id] = split
+        start = end
+    return assignment
+
+
+def assign_stratified(image_ids, image_cats, splits, ratios, seed):
+    """
+    贪心分层（iterative stratification）：按图片中最稀有类别的出现次数从少到多处理，
+    每张图片放入其最稀有类别"还缺得最多"的划分，相同时放入图片数还缺得最多的划分
+    """
+    total = sum(ratios)
+    ratios = [r / total for r in ratios]
+    cat_count = Counter(c for cats in image_cats.values() for c in cats)
+    need_cat = {s: {c: n * r for c, n in cat_count.items()} for s, r in zip(splits, ratios)}
+    need_img = {s: len(image_ids) * r for s, r in zip(splits, ratios)}
+
+    rng = random.Random(seed)
+    ids = list(image_ids)
+    rng.shuffle(ids)
+    rarest = {i: min(cats, key=lambda c: cat_count[c]) for i, cats in image_cats.items() if cats}
+    ids.sort(key=lambda i: cat_count[rarest[i]] if i in rarest else float('inf'))
+
+    assignment = {}
+    for img_id in ids:
+        cats = image_cats.get(img_id, ())
+        if img_id in rarest:
+            best = max(splits, key=lambda s: (need_cat[s][rarest[img_id]], need_img[s]))
+        else:
+            best = max(splits, key=lambda s: need_img[s])
+        assignment[img_id] = best
+        need_img[best] -= 1
+        for c in cats:
+            need_cat[best][c] -= 1
+    return assignment
+
+
+def split_coco(anno_file, out_dir, splits, ratios, method='random', seed=0):
+    """返回 (image_id->split, image_id->file_name)"""
+    with open(anno_file, 'r', encoding='utf-8') as f:
+        dataset = json.load(f)
+
+    image_ids = [img['id'] for img in dataset['images']]
+    if method == 'stratified':
+        image_cats = defaultdict(set)
+        for ann in dataset['annotations']:
+            image_cats[ann['image_id']].add(ann['category_id'])
+        assignment = assign_stratified(image_ids, image_cats, splits, ratios, seed)
+    else:
+        assignment = assign_random(image_ids, splits, ratios, seed)
+
+    os.makedirs(out_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(anno_file))[0]
+    header = {k: v for k, v in dataset.items() if k not in ('images', 'annotations', 'categories')}
+    counts = {s: [0, 0] for s in splits}
+    file_names = {}
+
+    # 先写到 .part 临时文件，全部写完后再改名，出错时删除，不会留下看起来完整的半截json
+    paths = {s: os.path.join(out_dir, f"{name}_{s}.json") for s in splits}
+    try:
+        with ExitStack() as stack:
+            files = {s: stack.enter_context(open(paths[s] + '.part', 'w', encoding='utf-8')) for s in splits}
+            for f in files.values():
+                f.write('{')
+                for k, v in header.items():
+                    f.write(json.dumps(k) + ': ' + json.dumps(v, ensure_ascii=False) + ',\n')
+                f.write('"images": ')
+
+            with ExitStack() as arrays:
+                writers = {s: arrays.enter_context(JsonArrayWriter(files[s])) for s in splits}
+                for img in dataset['images']:
+                    split = assignment[img['id']]
+                    writers[split].write(img)
+                    file_names[img['id']] = img['file_name']
+                    counts[split][0] += 1
+            for f in files.values():
+                f.write(',\n"annotations": ')
+
+            with ExitStack() as arrays:
+                writers = {s: arrays.enter_context(JsonArrayWriter(files[s])) for s in splits}
+                for ann in dataset['annotations']:
+                    split = assignment.get(ann['image_id'])
+                    if split is None:
+                        continue
+                    writers[split].write(ann)
+                    counts[split][1] += 1
+            for f in files.values():
+                f.write(',\n"categories": ')
+                json.dump(dataset.get('categories', []), f, ensure_ascii=False)
+                f.write('}\n')
+    except BaseException:
+        for path in paths.values():
+            if os.path.exists(path + '.part'):
+                os.remove(path + '.part')
+        raise
+    for s in splits:
+        os.replace(paths[s] + '.part', paths[s])
+    del dataset
+
+    with open(os.path.join(out_dir, f"{name}_split_index.txt"), 'w', encoding='utf-8') as f:
+        for img_id in image_ids:
+            f.write(f"{img_id}\t{file_names[img_id]}\t{assignment[img_id]}\n")
+
+    for s in splits:
+        print("{}: image nums: {}, bbox nums: {}".format(s, counts[s][0], counts[s][1]))
+    return assignment, file_names
+
+
+if __name__ == '__main__':
+    """
+    脚本说明：
+        一次读取coco的json，按random或stratified方式划分，写出每个划分的json和划分索引文件
+        可选地按同一划分复制yolo格式的数据（代替divide.py的随机划分）
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-jp', '--json-path', type=str, default='./sar_data/HRSID_jpg/annotations/train_test2017.json', help='json path')
+    parser.add_argument('-s', '--save-path', type=str, default='./sar_data/HRSID_jpg/annotations/split', help='output dir')
+    parser.add_argument('--splits', type=str, nargs='+', default=['train', 'val', 'test'], help='split names')
+    parser.add_argument('--ratios', type=float, nargs='+', default=[0.7, 0.2, 0.1], help='split ratios')
+    parser.add_argument('--method', type=str, default='random', choices=['random', 'stratified'], help='split method')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--yolo-images', type=str, default=None, help='yolo image dir, e.g. ./sar_data/HRSID_jpg/yolo_file/images')
+    parser.add_argument('--yolo-labels', type=str, default=None, help='yolo label dir, e.g. ./sar_data/HRSID_jpg/yolo_file/train_test')
+    parser.add_argument('--yolo-out', type=str, default='./sar_data/HRSID_jpg/yolo_file/Dataset', help='yolo dataset dir')
+    opt = parser.parse_args()
+    print(opt)
+
+    assert len(opt.splits) == len(opt.ratios), "splits and ratios must have the same length"
+    assert os.path.exists(opt.json_path), "json path:{} does not exists".format(opt.json_path)
+    assignment, file_names = split_coco(opt.json_path, opt.save_path, opt.splits, opt.ratios, opt.method, opt.seed)
+    if opt.yolo_images and opt.yolo_labels:
+        file_split = {os.path.basename(file_names[i]): s for i, s in assignment.items()}
+        split_by_index(opt.yolo_images, opt.yolo_labels, file_split, opt.yolo_out)
@@ -1,15 +1,53 @@
-import os, shutil, random
+import os, shutil, sys
 from tqdm import tqdm
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'other_tool'))
+from dup_groups import load_groups, sample_by_group
+
 """
 标注文件是yolo格式（txt文件）
 训练集：验证集：测试集 （7：2：1） 
+如果传入other_tool/dedup_index.py生成的重复组文件，同一组的图片会被划分到同一个集合
+如果传入coco_split.py生成的划分索引文件，按索引中的划分复制，与coco json的划分保持一致
 """
 
 
-def split_img(img_path, label_path, split_list):
+# 读取coco_split.py生成的划分索引（image_id  file_name  split），返回 文件名->划分
+def load_split_index(index_file):
+    index = dict()
+    with open(index_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) == 3:
+                index[os.path.basename(parts[1])] = parts[2]
+    return index
+
+
+# 按 文件名->划分 复制图片和标签到 Data/images/{split} 与 Data/labels/{split}
+def split_by_index(img_path, label_path, file_split, Data):
+    for split in set(file_split.values()):
+        os.makedirs(os.path.join(Data, 'images', split), exist_ok=True)
+        os.makedirs(os.path.join(Data, 'labels', split), exist_ok=True)
+    missing = 0
+    for name, split in tqdm(file_split.items(), desc='split ', ncols=80, unit='img'):
+        img = os.path.join(img_path, name)
+        if not os.path.exists(img):
+            missing += 1
+            continue
+        _copy(img, os.path.join(Data, 'images', split))
+        label = toLabelPath(img, label_path)
+        if os.path.exists(label):
+            _copy(label, os.path.join(Data, 'labels', split))
+    if missing:
+        print('{} 张图片在 {} 中不存在'.format(missing, img_path))
+
+
+def split_img(img_path, label_path, split_list, groups_file=None, Data='./sar_data/HRSID_jpg/yolo_file/Dataset',
+              index_file=None):
+    if index_file:
+        split_by_index(img_path, label_path, load_split_index(index_file), Data)
+        return
     try:
-        Data = './sar_data/HRSID_jpg/yolo_file/Dataset'
         # Data是你要将要创建的文件夹路径（路径一定是相对于你当前的这个脚本而言的）
         # os.mkdir(Data)
 
@@ -33,11 +71,12 @@ def split_img(img_path, label_path, split_list):
         print('文件目录已存在')
 
     train, val, test = split_list
+    groups = load_groups(groups_file) if groups_file else None
     all_img = os.listdir(img_path)
     all_img_path = [os.path.join(img_path, img) for img in all_img]
     # all_label = os.listdir(label_path)
     # all_label_path = [os.path.join(label_path, label) for label in all_label]
-    train_img = random.sample(all_img_path, int(train * len(all_img_path)))
+    train_img = sample_by_group(all_img_path, int(train * len(all_img_path)), groups)
     train_img_copy = [os.path.join(train_img_dir, os.path.basename(img)) for img in train_img]
     train_label = [toLabelPath(img, label_path) for img in train_img]
     train_label_copy = [os.path.join(train_label_dir, os.path.basename(label)) for label in train_label]
@@ -45,7 +84,7 @@ def split_img(img_path, label_path, split_list):
         _copy(train_img[i], train_img_dir)
         _copy(train_label[i], train_label_dir)
         all_img_path.remove(train_img[i])
-    val_img = random.sample(all_img_path, int(val / (val + test) * len(all_img_path)))
+    val_img = sample_by_group(all_img_path, int(val / (val + test) * len(all_img_path)), groups)
     val_label = [toLabelPath(img, label_path) for img in val_img]
     for i in tqdm(range(len(val_img)), desc='val ', ncols=80, unit='img'):
         _copy(val_img[i], val_img_dir)
@@ -72,4 +111,6 @@ if __name__ == '__main__':
     img_path = './sar_data/HRSID_jpg/yolo_file/images'  # 你的图片存放的路径（路径一定是相对于你当前的这个脚本文件而言的）
     label_path = './sar_data/HRSID_jpg/yolo_file/train_test'  # 你的txt文件存放的路径（路径一定是相对于你当前的这个脚本文件而言的）
     split_list = [0.7, 0.2, 0.1]  # 数据集划分比例[train:val:test]
-    split_img(img_path, label_path, split_list)
+    groups_file = None  # other_tool/dedup_index.py --groups 生成的重复组文件，None表示按图片随机划分
+    index_file = None  # coco_split.py 生成的 *_split_index.txt，给出时忽略split_list，按索引划分
+    split_img(img_path, label_path, split_list, groups_file, index_file=index_file)
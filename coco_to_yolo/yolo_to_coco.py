@@ -0,0 +1,217 @@
+import os
+import json
+import sys
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.join(ROOT, 'dota_to_yolo') not in sys.path:
+    sys.path.append(os.path.join(ROOT, 'dota_to_yolo'))
+
+from obb_geometry import is_normalized
+
+"""
+yolo格式（txt文件）转回coco格式（json文件），即coco_to_yolo.load_coco的逆过程
+gt模式：  每行 cls xc yc w h 或 cls x1 y1 ... x4 y4（obb），输出images/annotations/categories
+pred模式：val.py --save-txt --save-conf 的输出，每行末尾多一个conf，输出coco results列表
+json是边读边写的，内存里只保留源标注文件中 文件名->图片信息 的索引
+"""
+
+
+# 从源coco标注文件中建立 文件名(无后缀)->{id,width,height} 的索引，沿用原始的image id
+def load_image_index(anno_file):
+    with open(anno_file, 'r', encoding='utf-8') as f:
+        dataset = json.load(f)
+    index = dict()
+    for img in dataset['images']:
+        stem = os.path.splitext(os.path.basename(img['file_name']))[0]
+        index[stem] = {'id': img['id'], 'file_name': img['file_name'],
+                       'width': img['width'], 'height': img['height']}
+    categories = dataset.get('categories', [])
+    del dataset
+    return index, categories
+
+
+# 将一行yolo标签解析为 (cls, 坐标列表, conf)，坐标为归一化值
+def parse_yolo_line(line, with_conf):
+    parts = line.split()
+    if not parts:
+        return None
+    n = len(parts) - 1
+    if with_conf and n in (5, 9):
+        conf = float(parts[-1])
+        coords = list(map(float, parts[1:-1]))
+    elif n in (4, 8):
+        conf = 1.0
+        coords = list(map(float, parts[1:]))
+    else:
+        return None
+    if not is_normalized(coords):
+        return None
+    return int(float(parts[0])), coords, conf
+
+
+# 将归一化坐标还原为像素坐标，返回 (bbox[x,y,w,h], polygon或None)
+def denormalize(coords, width, height):
+    if len(coords) == 4:
+        xc, yc, w, h = coords
+        bw = w * width
+        bh = h * height
+        return [xc * width - bw / 2., yc * height - bh / 2., bw, bh], None
+    poly = [c * (width if i % 2 == 0 else height) for i, c in enumerate(coords)]
+    xs = poly[0::2]
+    ys = poly[1::2]
+    bbox = [min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)]
+    return bbox, poly
+
+
+def _polygon_area(poly):
+    xs = poly[0::2]
+    ys = poly[1::2]
+    s = 0.
+    for i in range(len(xs)):
+        j = (i + 1) % len(xs)
+        s += xs[i] * ys[j] - xs[j] * ys[i]
+    return abs(s) / 2.
+
+
+class JsonArrayWriter:
+    """把元素逐个写入一个json数组，不在内存中累积"""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def __enter__(self):
+        self.f.write('[')
+        return self
+
+    def write(self, item):
+        if self.count:
+            self.f.write(',')
+        self.f.write('\n')
+        self.f.write(json.dumps(item, ensure_ascii=False))
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self.f.write('\n]' if self.count else ']')
+        return False
+
+
+# 按文件名顺序遍历标签目录，逐个产出 (图片信息, 标签文件)
+def iter_label_files(label_path, index, warn=True):
+    names = sorted(n for n in os.listdir(label_path) if n.endswith('.txt') and n != 'classes.txt')
+    missing = 0
+    for name in names:
+        stem = name[:-4]
+        img = index.get(stem)
+        if img is None:
+            missing += 1
+            continue
+        with open(os.path.join(label_path, name), 'r', encoding='utf-8') as f:
+            yield img, f
+    if missing and warn:
+        print("warning: {} label files have no matching image in the annotation file".format(missing))
+
+
+def _round(values, ndigits):
+    return [round(v, ndigits) for v in values]
+
+
+# 报告无法解析而被跳过的行（列数不对、带conf的行用gt模式读取、坐标不是归一化值等）
+def _warn_skipped(skipped, mode):
+    if not skipped:
+        return
+    hint = "; lines with a conf column need -m pred" if mode == 'gt' else ""
+    print("warning: {} label lines could not be parsed and were skipped{}".format(skipped, hint))
+
+
+def write_predictions(label_path, index, out_file, cat_offset=0, ndigits=2):
+    """pred模式：写出coco results格式 [{image_id, category_id, bbox, score}, ...]"""
+    skipped = 0
+    with open(out_file, 'w', encoding='utf-8') as f, JsonArrayWriter(f) as results:
+        for img, lines in iter_label_files(label_path, index):
+            for line in lines:
+                obj = parse_yolo_line(line, with_conf=True)
+                if obj is None:
+                    skipped += bool(line.strip())
+                    continue
+                cls, coords, conf = obj
+                bbox, _ = denormalize(coords, img['width'], img['height'])
+                results.write({'image_id': img['id'], 'category_id': cls + cat_offset,
+                               'bbox': _round(bbox, ndigits), 'score': round(conf, 5)})
+    _warn_skipped(skipped, 'pred')
+    return results.count
+
+
+def write_ground_truth(label_path, index, categories, out_file, cat_offset=0, ndigits=2):
+    """gt模式：写出完整的coco标注文件，images只包含有标签文件的图片"""
+    skipped = 0
+    with open(out_file, 'w', encoding='utf-8') as f:
+        f.write('{"images": ')
+        with JsonArrayWriter(f) as images:
+            for img, _ in iter_label_files(label_path, index, warn=False):
+                images.write(img)
+        f.write(',\n"annotations": ')
+        with JsonArrayWriter(f) as annotations:
+            for img, lines in iter_label_files(label_path, index):
+                for line in lines:
+                    obj = parse_yolo_line(line, with_conf=False)
+                    if obj is None:
+                        skipped += bool(line.strip())
+                        continue
+                    cls, coords, _ = obj
+                    bbox, poly = denormalize(coords, img['width'], img['height'])
+                    ann = {'id': annotations.count + 1, 'image_id': img['id'],
+                           'category_id': cls + cat_offset, 'bbox': _round(bbox, ndigits),
+                           'area': round(bbox[2] * bbox[3] if poly is None else _polygon_area(poly), ndigits),
+                           'iscrowd': 0}
+                    if poly is not None:
+                        ann['segmentation'] = [_round(poly, ndigits)]
+                    annotations.write(ann)
+        f.write(',\n"categories": ')
+        json.dump(categories, f, ensure_ascii=False)
+        f.write('}\n')
+    _warn_skipped(skipped, 'gt')
+    return images.count, annotations.count
+
+
+def parseYoloDir(label_path, anno_file, out_file, mode='pred', cat_offset=0):
+    assert os.path.isdir(label_path), "label path:{} does not exists".format(label_path)
+    assert os.path.exists(anno_file), "json path:{} does not exists".format(anno_file)
+    assert mode in ('pred', 'gt'), "mode:{} must be pred or gt".format(mode)
+    out_dir = os.path.dirname(out_file)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    index, categories = load_image_index(anno_file)
+    if mode == 'pred':
+        n = write_predictions(label_path, index, out_file, cat_offset)
+        print("results nums: {}".format(n))
+    else:
+        n_img, n_ann = write_ground_truth(label_path, index, categories, out_file, cat_offset)
+        print("image nums: {}".format(n_img))
+        print("bbox nums: {}".format(n_ann))
+
+
+if __name__ == '__main__':
+    """
+    脚本说明：
+        该脚本用于将yolo格式的txt文件（标签或val.py --save-conf的预测结果）转换为coco格式的json文件
+    参数说明：
+        label_path:txt文件所在的路径
+        json_path:源coco标注文件，用于获取原始的image id和图片尺寸
+        save_path:输出的json文件
+        mode:pred输出coco results列表，gt输出完整的标注文件
+        cat_offset:category_id = yolo类别 + cat_offset（change_1_to_0处理过的标签设为1）
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-lp', '--label-path', type=str, default='./runs/val/exp/labels', help='yolo txt path')
+    parser.add_argument('-jp', '--json-path', type=str, default='./sar_data/HRSID_jpg/annotations/test2017.json', help='source coco json path')
+    parser.add_argument('-s', '--save-path', type=str, default='./runs/val/exp/predictions.json', help='json save path')
+    parser.add_argument('-m', '--mode', type=str, default='pred', choices=['pred', 'gt'], help='pred or gt')
+    parser.add_argument('--cat-offset', type=int, default=0, help='category_id = yolo class + offset')
+    opt = parser.parse_args()
+
+    if len(sys.argv) > 1:
+        print(opt)
+    parseYoloDir(opt.label_path, opt.json_path, opt.save_path, opt.mode, opt.cat_offset)
@@ -0,0 +1,125 @@
+import queue
+import shutil
+import threading
+from tqdm import tqdm
+
+"""
+Overlapped I/O for the DOTA conversion scripts.
+
+Each image goes through a chain of stages (probe header -> copy image -> read and
+convert annotation -> write label). Every stage has its own thread pool and a bounded
+input queue, so different images sit in different stages at the same time and the
+disk is never idle waiting on a single file. A full queue blocks the stage before it
+(backpressure), which bounds memory no matter how many images there are.
+"""
+
+_DONE = object()
+_DROPPED = object()
+
+
+def run_pipeline(items, stages, queue_depth=32, desc=None):
+    """
+    Run items through stages concurrently and return the number of items that made it through.
+
+    stages: list of (name, fn, num_workers). fn(item) returns the item for the next stage,
+            or None to drop it. Exceptions are reported and drop the item.
+    queue_depth: maximum number of items waiting in front of each stage.
+    """
+    queues = [queue.Queue(maxsize=queue_depth) for _ in stages]
+    queues.append(queue.Queue(maxsize=queue_depth))
+
+    def worker(index, name, fn, state):
+        in_q, out_q = queues[index], queues[index + 1]
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                in_q.put(_DONE)  # let the other workers of this stage see it too
+                with state["lock"]:
+                    state["alive"] -= 1
+                    last = state["alive"] == 0
+                if last:
+                    out_q.put(_DONE)
+                return
+            try:
+                result = fn(item)
+            except Exception as e:
+                print(f"Error in {name} stage for {item}: {e}. Skipping.")
+                result = None
+            if result is None:
+                queues[-1].put(_DROPPED)  # still counts towards the progress bar
+            else:
+                out_q.put(result)
+
+    threads = []
+    for index, (name, fn, num_workers) in enumerate(stages):
+        state = {"lock": threading.Lock(), "alive": num_workers}
+        for _ in range(num_workers):
+            t = threading.Thread(target=worker, args=(index, name, fn, state), daemon=True)
+            t.start()
+            threads.append(t)
+
+    def feed():
+        for item in items:
+            queues[0].put(item)
+        queues[0].put(_DONE)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    done = 0
+    with tqdm(total=len(items) if hasattr(items, "__len__") else None, desc=desc) as bar:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            if item is not _DROPPED:
+                done += 1
+            bar.update(1)
+
+    feeder.join()
+    for t in threads:
+        t.join()
+    return done
+
+
+def process_files_pipelined(file_list, annotations_dir, dest_img_dir, dest_label_dir,
+                            get_dimensions, convert_annotation, set_name,
+                            num_workers=8, queue_depth=32):
+    """
+    Pipelined equivalent of the sequential copy / probe / convert / write loop.
+
+    get_dimensions(img_path) -> (width, height)
+    convert_annotation(ann_path, width, height) -> list of label lines
+    Images whose header cannot be read are skipped before they are copied.
+    """
+    def probe(img_path):
+        try:
+            width, height = get_dimensions(img_path)
+        except Exception as e:
+            print(f"Error getting dimensions for {img_path}: {e}. Skipping this image.")
+            return None
+        return {"img_path": img_path, "width": width, "height": height}
+
+    def copy(item):
+        shutil.copy2(item["img_path"], dest_img_dir / item["img_path"].name)
+        return item
+
+    def convert(item):
+        ann_path = annotations_dir / (item["img_path"].stem + ".txt")
+        item["lines"] = convert_annotation(ann_path, item["width"], item["height"])
+        return item
+
+    def write(item):
+        dest_label_path = dest_label_dir / (item["img_path"].stem + ".txt")
+        with open(dest_label_path, 'w', encoding='utf-8') as f_out:
+            for line in item["lines"]:
+                f_out.write(line + "\n")
+        return item
+
+    stages = [
+        ("probe", probe, num_workers),
+        ("copy", copy, num_workers),
+        ("convert", convert, max(1, num_workers // 2)),
+        ("write", write, max(1, num_workers // 2)),
+    ]
+    return run_pipeline(file_list, stages, queue_depth=queue_depth, desc=f"Converting {set_name} set")
@@ -0,0 +1,259 @@
+import numpy as np
+
+"""
+Vectorized oriented-bounding-box geometry for the DOTA -> YOLO OBB conversion.
+
+Polygons are NumPy arrays of shape (N, K, 2) (or flat (N, 2K)), rotated boxes are
+(N, 5) arrays of (cx, cy, w, h, angle) with the angle in radians, regularized to
+[0, pi/2). Every function works on a whole annotation file at once.
+"""
+
+OUTPUT_FORMATS = ("poly", "xywhr")
+# Upper bound for normalized label coordinates. Anything larger is in pixels, e.g. the
+# "xywhr" output, which has as many columns as an HBB line with conf and cannot be told
+# apart by column count.
+NORM_TOL = 1.01
+
+
+def is_normalized(coords, tol=NORM_TOL):
+    """True if every label coordinate is normalized, i.e. the labels are not in pixels."""
+    if not isinstance(coords, np.ndarray):  # a single parsed line; skip the array conversion
+        return not coords or max(coords) <= tol
+    return coords.size == 0 or coords.max() <= tol
+
+
+def _as_points(polys):
+    polys = np.asarray(polys, dtype=np.float64)
+    if polys.ndim == 3:
+        return polys
+    return polys.reshape(len(polys), polys.shape[-1] // 2, 2)
+
+
+def _cross(u, v):
+    return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+
+def _shoelace(pts):
+    """Signed area of polygons pts[..., K, 2] (positive for counter-clockwise)."""
+    return 0.5 * _cross(pts, np.roll(pts, -1, axis=-2)).sum(-1)
+
+
+def _pad_invalid(pts, mask):
+    """Replace invalid vertices with the first vertex so they add only zero-length edges."""
+    return np.where(mask[..., None], pts, pts[..., :1, :])
+
+
+def poly_area(polys):
+    """Area of each polygon, shape (N,)."""
+    return np.abs(_shoelace(_as_points(polys)))
+
+
+def regularize_xywhr(rboxes):
+    """Bring angles into [0, pi/2), swapping w and h where needed."""
+    rboxes = np.array(rboxes, dtype=np.float64).reshape(-1, 5)
+    theta = rboxes[:, 4] % np.pi
+    swap = theta >= np.pi / 2
+    w = np.where(swap, rboxes[:, 3], rboxes[:, 2])
+    h = np.where(swap, rboxes[:, 2], rboxes[:, 3])
+    rboxes[:, 2], rboxes[:, 3], rboxes[:, 4] = w, h, theta % (np.pi / 2)
+    return rboxes
+
+
+def xywhr2poly(rboxes):
+    """Rotated boxes (N, 5) -> 4-point polygons (N, 8)."""
+    rboxes = np.asarray(rboxes, dtype=np.float64).reshape(-1, 5)
+    c = rboxes[:, None, :2]
+    cos, sin = np.cos(rboxes[:, 4]), np.sin(rboxes[:, 4])
+    u = np.stack([cos, sin], -1)[:, None] * rboxes[:, None, 2:3] / 2
+    v = np.stack([-sin, cos], -1)[:, None] * rboxes[:, None, 3:4] / 2
+    corners = np.concatenate([c - u - v, c + u - v, c + u + v, c - u + v], axis=1)
+    return corners.reshape(-1, 8)
+
+
+def min_area_rect(polys, mask=None):
+    """
+    Minimum-area enclosing rectangle of each point set, returned as (N, 5) xywhr.
+    The optimal rectangle has a side parallel to a convex-hull edge, and every hull
+    edge joins two of the input points, so all point pairs are tried as directions.
+    """
+    pts = _as_points(polys)
+    n, k = pts.shape[:2]
+    if mask is None:
+        mask = np.ones((n, k), dtype=bool)
+    pts = _pad_invalid(pts, mask)
+
+    d = pts[:, None, :, :] - pts[:, :, None, :]                     # (N, K, K, 2)
+    length = np.hypot(d[..., 0], d[..., 1])
+    valid = (length > 1e-9) & mask[:, :, None] & mask[:, None, :]
+    theta = np.arctan2(d[..., 1], d[..., 0]).reshape(n, k * k)      # (N, D)
+    valid = valid.reshape(n, k * k)
+
+    cos, sin = np.cos(theta), np.sin(theta)
+    pu = pts[:, None, :, 0] * cos[..., None] + pts[:, None, :, 1] * sin[..., None]    # (N, D, K)
+    pv = -pts[:, None, :, 0] * sin[..., None] + pts[:, None, :, 1] * cos[..., None]
+    w = pu.max(-1) - pu.min(-1)
+    h = pv.max(-1) - pv.min(-1)
+    area = np.where(valid, w * h, np.inf)
+    best = area.argmin(-1)[:, None]
+
+    def pick(x):
+        return np.take_along_axis(x, best, axis=1)[:, 0]
+
+    t, c, s = pick(theta), pick(cos), pick(sin)
+    mu = (pick(pu.max(-1)) + pick(pu.min(-1))) / 2
+    mv = (pick(pv.max(-1)) + pick(pv.min(-1))) / 2
+    # Degenerate sets (all points equal) fall back to a zero-size box at that point.
+    degenerate = ~valid.any(-1)
+    t = np.where(degenerate, 0., t)
+    cx = np.where(degenerate, pts[:, 0, 0], mu * c - mv * s)
+    cy = np.where(degenerate, pts[:, 0, 1], mu * s + mv * c)
+    w = np.where(degenerate, 0., pick(w))
+    h = np.where(degenerate, 0., pick(h))
+    return regularize_xywhr(np.stack([cx, cy, w, h, t], -1))
+
+
+def poly2xywhr(polys):
+    """4-point polygons (N, 8) -> rotated boxes (N, 5) via the minimum-area rectangle."""
+    return min_area_rect(polys)
+
+
+def _compact(pts, mask):
+    """Move valid vertices to the front of each row and trim unused columns."""
+    order = np.argsort(~mask, axis=1, kind="stable")
+    pts = np.take_along_axis(pts, order[..., None], axis=1)
+    mask = np.take_along_axis(mask, order, axis=1)
+    k = max(int(mask.sum(1).max()) if len(mask) else 0, 1)
+    return pts[:, :k], mask[:, :k]
+
+
+def _clip_halfplane(pts, mask, axis, bound, keep_greater):
+    """One Sutherland-Hodgman step against the line pts[..., axis] == bound."""
+    n, k = mask.shape
+    count = mask.sum(1, keepdims=True)
+    idx = np.arange(k)[None]
+    nxt = np.where(idx + 1 < count, idx + 1, 0)
+    nx = np.take_along_axis(pts, nxt[..., None], axis=1)
+
+    sign = 1. if keep_greater else -1.
+    dc = sign * (pts[..., axis] - bound)
+    dn = sign * (nx[..., axis] - bound)
+    in_c, in_n = dc >= 0, dn >= 0
+    crossing = mask & (in_c != in_n)
+    t = np.where(crossing, dc / np.where(crossing, dc - dn, 1.), 0.)
+    inter = pts + t[..., None] * (nx - pts)
+    inter[..., axis] = np.where(crossing, bound, inter[..., axis])
+
+    out = np.stack([pts, inter], axis=2).reshape(n, 2 * k, 2)
+    out_mask = np.stack([mask & in_c, crossing], axis=2).reshape(n, 2 * k)
+    return _compact(out, out_mask)
+
+
+def clip_polygons(polys, width, height):
+    """
+    Clip convex polygons to the image rectangle [0, width] x [0, height].
+    Returns (pts (N, K', 2), mask (N, K')) where mask marks the vertices in use;
+    polygons entirely outside the image end up with no valid vertices.
+    """
+    pts = _as_points(polys)
+    mask = np.ones(pts.shape[:2], dtype=bool)
+    for axis, bound, keep_greater in ((0, 0., True), (0, float(width), False),
+                                      (1, 0., True), (1, float(height), False)):
+        pts, mask = _clip_halfplane(pts, mask, axis, bound, keep_greater)
+    return pts, mask
+
+
+def poly_iou(a, b, eps=1e-9):
+    """
+    IoU between every pair of convex polygons a (N, Ka, 2) and b (M, Kb, 2), shape (N, M).
+    The intersection is the convex hull of the vertices of each polygon that lie inside
+    the other plus all edge-edge crossings; it is measured with the shoelace formula
+    after sorting the candidate points by angle around their centroid.
+    """
+    pa, pb = _as_points(a), _as_points(b)
+    sa, sb = _shoelace(pa), _shoelace(pb)
+    pa = np.where((sa < 0)[:, None, None], pa[:, ::-1], pa)         # make counter-clockwise
+    pb = np.where((sb < 0)[:, None, None], pb[:, ::-1], pb)
+    area_a, area_b = np.abs(sa), np.abs(sb)
+    n, m, ka, kb = len(pa), len(pb), pa.shape[1], pb.shape[1]
+
+    A, B = pa[:, None], pb[None]                                    # (N,1,Ka,2), (1,M,Kb,2)
+    ea = np.roll(A, -1, axis=2) - A
+    eb = np.roll(B, -1, axis=2) - B
+
+    a_in_b = (_cross(eb[:, :, None], A[:, :, :, None] - B[:, :, None]) >= -eps).all(-1)
+    b_in_a = (_cross(ea[:, :, None], B[:, :, :, None] - A[:, :, None]) >= -eps).all(-1)
+
+    p, r = A[:, :, :, None], ea[:, :, :, None]
+    q, s = B[:, :, None], eb[:, :, None]
+    denom = _cross(r, s)
+    ok = np.abs(denom) > eps
+    denom = np.where(ok, denom, 1.)
+    t = _cross(q - p, s) / denom
+    u = _cross(q - p, r) / denom
+    hit = ok & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    crossings = p + t[..., None] * r
+
+    pts = np.concatenate([np.broadcast_to(A, (n, m, ka, 2)), np.broadcast_to(B, (n, m, kb, 2)),
+                          crossings.reshape(n, m, ka * kb, 2)], axis=2)
+    mask = np.concatenate([a_in_b, b_in_a, hit.reshape(n, m, ka * kb)], axis=2)
+
+    count = mask.sum(-1, keepdims=True)
+    center = (pts * mask[..., None]).sum(2) / np.maximum(count, 1)
+    d = pts - center[:, :, None]
+    angle = np.where(mask, np.arctan2(d[..., 1], d[..., 0]), np.inf)
+    order = np.argsort(angle, axis=-1)
+    pts = np.take_along_axis(pts, order[..., None], axis=2)
+    mask = np.take_along_axis(mask, order, axis=2)
+    inter = np.where(count[..., 0] >= 3, np.abs(_shoelace(_pad_invalid(pts, mask))), 0.)
+
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-12)
+
+
+def polys_to_yolo_lines(class_ids, polys, image_width, image_height, output_format="poly"):
+    """
+    Convert the pixel polygons (N, 8) of one annotation file to YOLO OBB label lines.
+
+    Polygons inside the image are kept as-is. Polygons crossing the image border are
+    clipped to it and replaced by the minimum-area rectangle of the clipped region,
+    instead of clamping each vertex separately (only the small overhang of the fitted
+    rectangle is clamped). Polygons fully outside are dropped.
+
+    output_format:
+        "poly":  class_index x1 y1 ... x4 y4, normalized to [0, 1]
+        "xywhr": class_index cx cy w h angle, in pixels and radians (a rotated box's
+                 sides are not aligned with the image axes, so w/h are not normalized).
+                 The other tools in this repo (preprocess_images, yolo_map, yolo_to_coco)
+                 only read normalized labels and reject this format.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format!r}")
+    class_ids = np.asarray(class_ids, dtype=np.int64)
+    polys = np.asarray(polys, dtype=np.float64).reshape(-1, 8)
+    if not len(polys):
+        return []
+
+    xs, ys = polys[:, 0::2], polys[:, 1::2]
+    inside = (xs >= 0).all(1) & (xs <= image_width).all(1) & (ys >= 0).all(1) & (ys <= image_height).all(1)
+
+    rboxes = np.zeros((len(polys), 5))
+    keep = np.ones(len(polys), dtype=bool)
+    if output_format == "xywhr" and inside.any():
+        rboxes[inside] = min_area_rect(polys[inside])
+    if (~inside).any():
+        pts, mask = clip_polygons(polys[~inside], image_width, image_height)
+        clipped = np.abs(_shoelace(_pad_invalid(pts, mask))) > 1e-6
+        cut = np.flatnonzero(~inside)
+        keep[cut[~clipped]] = False
+        rboxes[cut[clipped]] = min_area_rect(pts[clipped], mask[clipped])
+
+    if output_format == "xywhr":
+        rows = rboxes
+    else:
+        out = polys.copy()
+        out[~inside] = xywhr2poly(rboxes[~inside])
+        out[:, 0::2] = np.clip(out[:, 0::2] / image_width, 0.0, 1.0)
+        out[:, 1::2] = np.clip(out[:, 1::2] / image_height, 0.0, 1.0)
+        rows = out
+
+    return [f"{c} {' '.join(map(str, row))}" for c, row in zip(class_ids[keep].tolist(), rows[keep].tolist())]
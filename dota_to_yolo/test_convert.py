@@ -4,6 +4,8 @@ from PIL import Image
 from pathlib import Path
 from tqdm import tqdm
 import yaml # For reading/writing data.yaml
+from obb_geometry import polys_to_yolo_lines
+from io_pipeline import process_files_pipelined
 
 # --- Configuration ---
 # Original dataset for testing
@@ -30,20 +32,33 @@ YOLO_TEST_LABELS_DIR = YOLO_TEST_DIR / "labels"
 CLASSES_FILE_PATH = OUTPUT_YOLO_DATASET_DIR / "classes.txt"
 DATA_YAML_PATH = OUTPUT_YOLO_DATASET_DIR / "data.yaml"
 
+# Label format: "poly" (normalized 8-point polygon) or "xywhr" (cx cy w h angle, see obb_geometry)
+# Must match the format used for train/val.
+OUTPUT_FORMAT = "poly"
+
+# Overlap image copies, header probes, annotation reads and label writes across images.
+# PIPELINE_WORKERS = 0 falls back to the sequential loop.
+PIPELINE_WORKERS = 8
+PIPELINE_QUEUE_DEPTH = 32
+
 
 def get_image_dimensions(image_path):
     """Gets width and height of an image."""
     with Image.open(image_path) as img:
         return img.width, img.height
 
-def convert_dota_to_yolo_obb(dota_annotation_path, image_width, image_height, class_to_id_map):
+def convert_dota_to_yolo_obb(dota_annotation_path, image_width, image_height, class_to_id_map, output_format=None):
     """
     Converts a single DOTA annotation file to YOLO OBB format lines.
     """
-    yolo_lines = []
+    # Resolved at call time so that changing OUTPUT_FORMAT (e.g. from sar_cli.py) takes effect
+    if output_format is None:
+        output_format = OUTPUT_FORMAT
+    class_ids = []
+    polys = []
     if not dota_annotation_path.exists():
         print(f"Warning: Annotation file not found: {dota_annotation_path}")
-        return yolo_lines
+        return []
 
     with open(dota_annotation_path, 'r', encoding='utf-8') as f:
         for line in f:
@@ -60,27 +75,27 @@ def convert_dota_to_yolo_obb(dota_annotation_path, image_width, image_height, cl
                 if class_name not in class_to_id_map:
                     print(f"Warning: Unknown class '{class_name}' in {dota_annotation_path}. Skipping this object. Known classes: {list(class_to_id_map.keys())}")
                     continue
-                class_id = class_to_id_map[class_name]
-
-                normalized_coords = []
-                for i in range(0, 8, 2):
-                    norm_x = coords[i] / image_width
-                    norm_y = coords[i+1] / image_height
-                    normalized_coords.append(max(0.0, min(1.0, norm_x)))
-                    normalized_coords.append(max(0.0, min(1.0, norm_y)))
-                yolo_line = f"{class_id} {' '.join(map(str, normalized_coords))}"
-                yolo_lines.append(yolo_line)
+                class_ids.append(class_to_id_map[class_name])
+                polys.append(coords)
             except ValueError:
                 print(f"Warning: Could not parse coordinates in {dota_annotation_path}: {line.strip()}")
             except IndexError:
                 print(f"Warning: Index error parsing line in {dota_annotation_path}: {line.strip()}")
-    return yolo_lines
+    return polys_to_yolo_lines(class_ids, polys, image_width, image_height, output_format)
 
 def process_test_files(image_file_list, source_annotations_dir, dest_img_dir, dest_label_dir, class_to_id_map):
     """
     Processes test image files: copies them and converts their annotations.
     """
     print(f"\nProcessing test set...")
+    if PIPELINE_WORKERS > 0:
+        process_files_pipelined(
+            image_file_list, source_annotations_dir, dest_img_dir, dest_label_dir,
+            get_image_dimensions,
+            lambda ann_path, w, h: convert_dota_to_yolo_obb(ann_path, w, h, class_to_id_map),
+            "test", num_workers=PIPELINE_WORKERS, queue_depth=PIPELINE_QUEUE_DEPTH)
+        print(f"Test set processing complete.")
+        return
     for img_path in tqdm(image_file_list, desc="Converting test set"):
         base_name = img_path.stem
         dest_image_path = dest_img_dir / img_path.name
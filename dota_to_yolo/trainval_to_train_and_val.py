@@ -1,9 +1,15 @@
 import os
+import sys
 import shutil
 import random
 from PIL import Image # Pillow library for image dimensions
 from pathlib import Path
 from tqdm import tqdm # For progress bars
+from obb_geometry import polys_to_yolo_lines
+from io_pipeline import process_files_pipelined
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'other_tool'))
+from dup_groups import load_groups, group_units
 
 # --- Configuration ---
 ORIGINAL_DATASET_BASE_DIR = Path("D:/sl/SL-TRAINVAL/trainval") # Absolute path to your 'trainval' folder
@@ -23,22 +29,37 @@ YOLO_VAL_IMAGES_DIR = YOLO_VAL_DIR / "images"
 YOLO_VAL_LABELS_DIR = YOLO_VAL_DIR / "labels"
 
 TRAIN_RATIO = 0.9
+# Duplicate groups written by other_tool/dedup_index.py --groups; images of one group
+# always land in the same split. None splits image by image.
+GROUPS_FILE = None
+# Label format: "poly" (normalized 8-point polygon) or "xywhr" (cx cy w h angle, see obb_geometry)
+OUTPUT_FORMAT = "poly"
+
+# Overlap image copies, header probes, annotation reads and label writes across images.
+# PIPELINE_WORKERS = 0 falls back to the sequential loop.
+PIPELINE_WORKERS = 8
+PIPELINE_QUEUE_DEPTH = 32
 
 def get_image_dimensions(image_path):
     """Gets width and height of an image."""
     with Image.open(image_path) as img:
         return img.width, img.height
 
-def convert_dota_to_yolo_obb(dota_annotation_path, image_width, image_height, class_to_id_map):
+def convert_dota_to_yolo_obb(dota_annotation_path, image_width, image_height, class_to_id_map, output_format=None):
     """
     Converts a single DOTA annotation file to YOLO OBB format lines.
     DOTA format: x1 y1 x2 y2 x3 y3 x4 y4 class_name difficulty
     YOLO OBB format: class_index x1_norm y1_norm x2_norm y2_norm x3_norm y3_norm x4_norm y4_norm
+    Boxes crossing the image border are clipped as polygons (see obb_geometry.polys_to_yolo_lines).
     """
-    yolo_lines = []
+    # Resolved at call time so that changing OUTPUT_FORMAT (e.g. from sar_cli.py) takes effect
+    if output_format is None:
+        output_format = OUTPUT_FORMAT
+    class_ids = []
+    polys = []
     if not dota_annotation_path.exists():
         print(f"Warning: Annotation file not found: {dota_annotation_path}")
-        return yolo_lines
+        return []
 
     with open(dota_annotation_path, 'r') as f:
         for line in f:
@@ -56,26 +77,15 @@ def convert_dota_to_yolo_obb(dota_annotation_path, image_width, image_height, cl
                     print(f"Warning: Unknown class '{class_name}' in {dota_annotation_path}. Skipping this object.")
                     continue
 
-                class_id = class_to_id_map[class_name]
-
-                # Normalize coordinates
-                normalized_coords = []
-                for i in range(0, 8, 2): # x1, y1, x2, y2...
-                    norm_x = coords[i] / image_width
-                    norm_y = coords[i+1] / image_height
-                    # Clamp values to be within [0, 1] as sometimes annotations can be slightly outside
-                    normalized_coords.append(max(0.0, min(1.0, norm_x)))
-                    normalized_coords.append(max(0.0, min(1.0, norm_y)))
-
-                yolo_line = f"{class_id} {' '.join(map(str, normalized_coords))}"
-                yolo_lines.append(yolo_line)
+                class_ids.append(class_to_id_map[class_name])
+                polys.append(coords)
             except ValueError:
                 print(f"Warning: Could not parse coordinates in {dota_annotation_path}: {line.strip()}")
             except IndexError:
                 print(f"Warning: Index error parsing line in {dota_annotation_path}: {line.strip()}")
 
-
-    return yolo_lines
+    # Normalize (and clip to the image) the whole file at once
+    return polys_to_yolo_lines(class_ids, polys, image_width, image_height, output_format)
 
 def main():
     print(f"Original dataset base: {ORIGINAL_DATASET_BASE_DIR}")
@@ -143,6 +153,16 @@ names: {sorted_class_names}
     num_images = len(all_image_files)
     num_train = int(num_images * TRAIN_RATIO)
 
+    if GROUPS_FILE:
+        # Shuffle whole duplicate groups and move the cut to a group boundary
+        units = group_units(all_image_files, load_groups(GROUPS_FILE))
+        all_image_files, cut = [], None
+        for unit in units:
+            all_image_files.extend(unit)
+            if cut is None and len(all_image_files) >= num_train:
+                cut = len(all_image_files)
+        num_train = cut if cut is not None else num_images
+
     train_files = all_image_files[:num_train]
     val_files = all_image_files[num_train:]
 
@@ -153,6 +173,14 @@ names: {sorted_class_names}
     # 4. Process files: copy images and convert annotations
     def process_files(file_list, dest_img_dir, dest_label_dir, set_name):
         print(f"\nProcessing {set_name} set...")
+        if PIPELINE_WORKERS > 0:
+            process_files_pipelined(
+                file_list, ORIGINAL_ANNOTATIONS_DIR, dest_img_dir, dest_label_dir,
+                get_image_dimensions,
+                lambda ann_path, w, h: convert_dota_to_yolo_obb(ann_path, w, h, class_to_id),
+                set_name, num_workers=PIPELINE_WORKERS, queue_depth=PIPELINE_QUEUE_DEPTH)
+            print(f"{set_name} set processing complete.")
+            return
         for img_path in tqdm(file_list, desc=f"Converting {set_name} set"):
             base_name = img_path.stem  # Filename without extension
             
@@ -3,6 +3,7 @@ import sys
 import os
 from datetime import datetime
 import argparse
+import signal
 
 def setup_encoding():
     """设置系统编码"""
@@ -11,8 +12,26 @@ def setup_encoding():
         sys.stdout.reconfigure(encoding='utf-8')
         sys.stderr.reconfigure(encoding='utf-8')
 
-def run_training(command, task_num, total_tasks, log_dir, root_dir):
-    """执行训练命令并返回执行状态"""
+def terminate_process(process):
+    """终止shell=True启动的命令及其子进程"""
+    if process.poll() is not None:
+        return
+    if sys.platform.startswith('win'):
+        subprocess.run(f"taskkill /F /T /PID {process.pid}", shell=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:  # 没有单独的进程组
+            process.terminate()
+    process.wait()
+
+def run_training(command, task_num, total_tasks, log_dir, root_dir, line_callback=None, on_start=None):
+    """
+    执行训练命令并返回执行状态
+    line_callback: 每读到一行输出调用一次，返回True时终止该任务（用于超参搜索的提前终止）
+    on_start: 进程启动后以Popen对象调用一次（超参搜索用来在Ctrl+C时终止所有试验）
+    """
     try:
         # 创建日志文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -44,8 +63,12 @@ def run_training(command, task_num, total_tasks, log_dir, root_dir):
             universal_newlines=True,
             encoding='utf-8',
             errors='replace',
-            cwd=root_dir  # 设置工作目录为项目根目录
+            cwd=root_dir,  # 设置工作目录为项目根目录
+            # 需要提前终止时放到单独的进程组，才能连同shell启动的子进程一起终止
+            start_new_session=line_callback is not None and not sys.platform.startswith('win')
         )
+        if on_start is not None:
+            on_start(process)
 
         # 实时读取并同时写入日志文件和控制台
         with open(log_file, 'a', encoding='utf-8') as f:
@@ -57,6 +80,12 @@ def run_training(command, task_num, total_tasks, log_dir, root_dir):
                     print(output.strip())
                     f.write(output)
                     f.flush()
+                    if line_callback is not None and line_callback(output):
+                        terminate_process(process)
+                        stop_msg = f"\n任务 {task_num}/{total_tasks} 被提前终止\n"
+                        print(stop_msg)
+                        f.write(stop_msg)
+                        return False
 
         return_code = process.poll()
         if return_code == 0:
@@ -89,7 +118,13 @@ def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description="自动训练脚本")
     parser.add_argument('--log_name', type=str, default=None, help='日志文件夹的自定义名称')
+    parser.add_argument('--sweep', type=str, default=None, help='超参搜索配置文件（yaml），格式见sweep.py')
     args = parser.parse_args()
+
+    if args.sweep:
+        from sweep import run_sweep
+        run_sweep(args.sweep, root_dir, args.log_name)
+        return
     
     # 定义训练序列
     commands = [
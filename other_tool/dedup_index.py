@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from dup_groups import save_groups
+from preprocess_images import file_hash, normalize_16bit
+
+"""
+图片去重/泄漏检测索引
+    - 对每张图片计算内容hash(sha1)和感知hash(64位dHash)，多进程计算，按mtime和文件大小缓存
+    - 近似重复通过分段分桶查找：汉明距离<=t的两个hash至少有一段完全相同（抽屉原理），
+      只比较落在同一个桶里的候选对，而不是所有图片两两比较
+    - 16位SAR图像先按百分位拉伸到8位再计算dHash；hash全0/全1（纯色图）的图片只按sha1查找完全相同的重复
+    - 输出重复组文件groups.txt（每行一组，tab分隔的文件名，不含后缀），
+      divide.py / cut_ssdd_data.py / trainval_to_train_and_val.py 读取该文件后会把同一组的图片划分到同一个集合
+"""
+
+IMG_FORMATS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+HASH_VERSION = 2  # dhash算法变化时加1，缓存中旧版本的hash会重新计算
+
+
+def to_gray8(img):
+    """转为8位灰度图，16位/I/F模式的SAR图像先按百分位拉伸，直接convert('L')会把大于255的值全部截断"""
+    if img.mode in ('I;16', 'I;16B', 'I;16L', 'I', 'F'):
+        return Image.fromarray(normalize_16bit(np.array(img)))
+    return img.convert('L')
+
+
+def is_degenerate(ph, bits=64):
+    """纯色或单调渐变的图片hash全0或全1，不能说明内容相似，不参与近似重复分桶"""
+    return ph == 0 or ph == (1 << bits) - 1
+
+
+def dhash(img, size=8):
+    """差值hash：缩放到(size+1)*size的灰度图，比较水平相邻像素"""
+    img.draft('L', (size * 8, size * 8))  # jpeg可以直接按低分辨率解码
+    px = to_gray8(img).resize((size + 1, size), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = px[row * (size + 1) + col]
+            right = px[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def hash_image(path):
+    """在子进程中执行：返回 (path, sha1, dhash)"""
+    sha1 = file_hash(path)
+    try:
+        with Image.open(path) as img:
+            ph = dhash(img)
+    except Exception as e:
+        print(f"warning: cannot decode {path}: {e}")
+        ph = None
+    return path, sha1, ph
+
+
+def build_index(dirs, cache_file=None, workers=None):
+    """
+    扫描目录下的所有图片，返回 {path: {'mtime', 'size', 'sha1', 'dhash'}}
+    cache_file中mtime和大小都没变的图片不再重新计算
+    """
+    cache = {}
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    index, todo = {}, []
+    for d in dirs:
+        for name in sorted(os.listdir(d)):
+            if not name.lower().endswith(IMG_FORMATS):
+                continue
+            path = os.path.join(d, name)
+            st = os.stat(path)
+            entry = cache.get(path)
+            if (entry and entry['mtime'] == st.st_mtime and entry['size'] == st.st_size
+                    and entry.get('version') == HASH_VERSION):
+                index[path] = entry
+            else:
+                index[path] = {'mtime': st.st_mtime, 'size': st.st_size, 'version': HASH_VERSION}
+                todo.append(path)
+
+    if todo:
+        chunksize = max(1, len(todo) // ((workers or os.cpu_count() or 1) * 8))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, sha1, ph in tqdm(pool.map(hash_image, todo, chunksize=chunksize),
+                                       total=len(todo), desc='hash ', ncols=80, unit='img'):
+                index[path]['sha1'] = sha1
+                index[path]['dhash'] = ph
+    print(f"images: {len(index)}, hashed: {len(todo)}, from cache: {len(index) - len(todo)}")
+
+    if cache_file:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+    return index
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def find_duplicate_groups(index, threshold=6, bits=64):
+    """
+    返回重复组列表（每组为路径列表，至少2张）
+    threshold: dHash汉明距离阈值，0表示只找内容完全相同的图片
+    """
+    paths = sorted(index)
+    uf = _UnionFind(len(paths))
+
+    by_sha1 = {}
+    for i, p in enumerate(paths):
+        sha1 = index[p].get('sha1')
+        if sha1 is None:
+            continue
+        if sha1 in by_sha1:
+            uf.union(i, by_sha1[sha1])
+        else:
+            by_sha1[sha1] = i
+
+    if threshold > 0:
+        # 分成threshold+1段，距离<=threshold的两个hash至少有一段相同
+        n_bands = threshold + 1
+        edges = [bits * k // n_bands for k in range(n_bands + 1)]
+        buckets = defaultdict(list)
+        for i, p in enumerate(paths):
+            ph = index[p].get('dhash')
+            if ph is None or is_degenerate(ph, bits):
+                continue
+            for b in range(n_bands):
+                key = (ph >> edges[b]) & ((1 << (edges[b + 1] - edges[b])) - 1)
+                buckets[(b, key)].append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for a in range(len(members)):
+                ha = index[paths[members[a]]]['dhash']
+                for c in range(a + 1, len(members)):
+                    i, j = members[a], members[c]
+                    if uf.find(i) != uf.find(j) and bin(ha ^ index[paths[j]]['dhash']).count('1') <= threshold:
+                        uf.union(i, j)
+
+    groups = defaultdict(list)
+    for i, p in enumerate(paths):
+        groups[uf.find(i)].append(p)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def report_leakage(groups, dirs):
+    """打印跨越多个目录（如train和test）的重复组"""
+    leaks = []
+    for g in groups:
+        owners = sorted({os.path.dirname(p) for p in g})
+        if len(owners) > 1:
+            leaks.append(g)
+    n_dup = sum(len(g) - 1 for g in groups)
+    print(f"duplicate groups: {len(groups)}, redundant images: {n_dup}")
+    if len(dirs) > 1:
+        print(f"groups spanning more than one directory: {len(leaks)}")
+        for g in leaks:
+            print('  ' + '  '.join(g))
+    return leaks
+
+
+def main():
+    """
+    脚本说明：
+        对一个或多个图片目录建立hash索引，查找重复/近似重复的图片
+        多个目录时（如 train val test，或合并的HRSID SSDD MSAR）会报告跨目录的重复组（数据泄漏）
+        --groups 保存的重复组文件可以传给划分脚本，做按组划分
+    """
+    parser = argparse.ArgumentParser(description="图片重复与数据泄漏检测")
+    parser.add_argument('dirs', nargs='+', help='图片目录')
+    parser.add_argument('--cache', type=str, default='hash_index.json', help='hash缓存文件')
+    parser.add_argument('--threshold', type=int, default=6, help='dHash汉明距离阈值，0只查找完全相同的图片')
+    parser.add_argument('--groups', type=str, default=None, help='重复组输出文件，例如 groups.txt')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认为cpu核数')
+    opt = parser.parse_args()
+
+    idx = build_index(opt.dirs, opt.cache, opt.workers)
+    dup_groups = find_duplicate_groups(idx, opt.threshold)
+    report_leakage(dup_groups, opt.dirs)
+    if opt.groups:
+        save_groups(dup_groups, opt.groups)
+        print(f"groups saved to {opt.groups}")
+
+
+if __name__ == '__main__':
+    main()
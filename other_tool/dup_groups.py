@@ -0,0 +1,54 @@
+import os
+import random
+
+"""
+重复组文件的读写与按组抽样
+重复组文件由dedup_index.py --groups生成：每行一组，tab分隔的文件名（不含后缀）
+divide.py / cut_ssdd_data.py / trainval_to_train_and_val.py 都通过这里读取，保证同一组的图片划分到同一个集合
+只依赖标准库，划分脚本导入时不会引入PIL、numpy等
+"""
+
+
+def stem(path):
+    return os.path.splitext(os.path.basename(str(path)))[0]
+
+
+def save_groups(groups, groups_file):
+    """每行一组，tab分隔的文件名（不含后缀），供划分脚本读取"""
+    with open(groups_file, 'w', encoding='utf-8') as f:
+        for g in groups:
+            f.write('\t'.join(sorted({stem(p) for p in g})) + '\n')
+
+
+def load_groups(groups_file):
+    """读取重复组文件，返回 文件名(不含后缀)->组号"""
+    groups = dict()
+    with open(groups_file, 'r', encoding='utf-8') as f:
+        for gid, line in enumerate(f):
+            for name in line.rstrip('\n').split('\t'):
+                if name:
+                    groups[name] = gid
+    return groups
+
+
+def group_units(items, groups, key=stem):
+    """按重复组把items分成若干单元（不在任何组中的元素单独成一个单元），保持items中的先后顺序"""
+    units = dict()
+    for item in items:
+        name = key(item)
+        units.setdefault(groups.get(name, name), []).append(item)
+    return list(units.values())
+
+
+def sample_by_group(items, k, groups=None, key=stem):
+    """随机抽取k个元素，有重复组时按组抽取（可能略多于k个）"""
+    if not groups:
+        return random.sample(list(items), k)
+    units = group_units(items, groups, key)
+    random.shuffle(units)
+    sampled = []
+    for unit in units:
+        if len(sampled) >= k:
+            break
+        sampled.extend(unit)
+    return sampled
@@ -0,0 +1,206 @@
+import argparse
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+from tqdm import tqdm
+
+"""
+把多个已经转换好的yolo数据集（HRSID、SSDD、MSAR、DOTA格式等）合并成一个数据集
+    - 图片用硬链接（失败时用软链接，再失败才复制），耗时只和标签大小有关，不随图片大小增长
+    - 每个数据集的文件名加上数据集名前缀，避免重名
+    - 按类别名把各数据集的类别统一映射到一个类别列表，标签在线程池中并行重写，不需要再跑change_1_to_0
+    - 最后生成一个data.yaml
+
+配置文件示例（merge.yaml）：
+    output: ./sar_data/merged
+    names: [ship]                    # 统一后的类别列表
+    link: hard                       # hard / sym / copy
+    datasets:
+      - name: hrsid
+        data: ./sar_data/HRSID_jpg/yolo_file/Dataset/data.yaml
+      - name: msar
+        train: ./sar_data/MSAR/yolo_style/train.txt
+        val: ./sar_data/MSAR/yolo_style/val.txt
+        names: ['飞机', '油罐', '桥梁', '船只', 'W']
+        map: {'船只': ship}            # 源类别名 -> 统一类别名，不在映射中的类别会被丢弃
+每个数据集可以给data（yolov5的data.yaml），也可以直接给train/val/test（图片目录或图片列表txt）和names（列表或classes.txt路径）
+names也可以是 {类别id: 类别名} 的字典（如coco_to_yolo的catid2name，HRSID转出的标签类别是coco的category_id，即 {1: ship}），
+此时按字典中的id匹配标签，而不是按顺序从0编号
+没有给map时按类别名同名匹配
+标签路径按yolov5的规则由图片路径得到：最后一个 /images/ 换成 /labels/，后缀换成 .txt
+"""
+
+SPLITS = ('train', 'val', 'test')
+IMG_FORMATS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+
+def img2label_path(img_path):
+    sa, sb = os.sep + 'images' + os.sep, os.sep + 'labels' + os.sep
+    img_path = os.path.normpath(img_path)
+    head, sep, tail = img_path.rpartition(sa)
+    if not sep:
+        raise ValueError(f"image path has no '{sa}' component: {img_path}")
+    return os.path.splitext(head + sb + tail)[0] + '.txt'
+
+
+def list_images(source, root):
+    """source为图片目录或图片列表txt，相对路径相对于root"""
+    if not os.path.isabs(source):
+        source = os.path.join(root, source)
+    if os.path.isdir(source):
+        return [os.path.join(source, f) for f in sorted(os.listdir(source)) if f.lower().endswith(IMG_FORMATS)]
+    base = os.path.dirname(source)
+    with open(source, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return [line if os.path.isabs(line) else os.path.normpath(os.path.join(base, line)) for line in lines]
+
+
+def load_names(names, root):
+    """返回 {类别id: 类别名}，列表和classes.txt按顺序从0编号，字典保留原来的id"""
+    if isinstance(names, dict):  # yolov5 新格式 {0: name, ...} 或 catid2name {1: name, ...}
+        return {int(k): v for k, v in names.items()}
+    if isinstance(names, str):
+        path = names if os.path.isabs(names) else os.path.join(root, names)
+        with open(path, 'r', encoding='utf-8') as f:
+            names = [line.strip() for line in f if line.strip()]
+    return dict(enumerate(names))
+
+
+def resolve_dataset(cfg, config_dir):
+    """把配置统一为 {'name', 'names', 'splits': {split: [图片路径]}}"""
+    spec = dict(cfg)
+    root = config_dir
+    if 'data' in cfg:
+        data_yaml = cfg['data'] if os.path.isabs(cfg['data']) else os.path.join(config_dir, cfg['data'])
+        with open(data_yaml, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        data.update({k: v for k, v in cfg.items() if k != 'data'})
+        spec = data
+        root = data.get('path') or os.path.dirname(data_yaml)
+        if not os.path.isabs(root):
+            root = os.path.join(os.path.dirname(data_yaml), root)
+    if 'names' not in spec:
+        raise ValueError(f"dataset '{cfg['name']}' has no class names")
+    splits = {s: list_images(spec[s], root) for s in SPLITS if spec.get(s)}
+    return {'name': cfg['name'], 'names': load_names(spec['names'], root),
+            'map': cfg.get('map'), 'splits': splits}
+
+
+def build_class_map(src_names, unified, mapping):
+    """{源类别id: 统一类别id}，映射不到的类别为None"""
+    index = {name: i for i, name in enumerate(unified)}
+    out = {}
+    for cid, name in src_names.items():
+        target = mapping.get(name) if mapping is not None else name
+        out[cid] = index.get(target)
+    return out
+
+
+def link_file(src, dst, mode):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode == 'hard':
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            mode = 'sym'
+    if mode == 'sym':
+        try:
+            os.symlink(os.path.abspath(src), dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def remap_label(src, dst, class_map):
+    """重写一个标签文件的类别id，返回 (保留的目标数, 丢弃的目标数)"""
+    kept, dropped = [], 0
+    if os.path.exists(src):
+        with open(src, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                cid = int(float(parts[0]))
+                new = class_map.get(cid)
+                if new is None:
+                    dropped += 1
+                    continue
+                kept.append(str(new) + ' ' + ' '.join(parts[1:]) + '\n')
+    with open(dst, 'w', encoding='utf-8') as f:
+        f.writelines(kept)
+    return len(kept), dropped
+
+
+def merge_datasets(config_file, workers=16):
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config_dir = os.path.dirname(os.path.abspath(config_file))
+    out = config['output'] if os.path.isabs(config['output']) else os.path.join(config_dir, config['output'])
+    unified = load_names(config['names'], config_dir)
+    unified = [unified[k] for k in sorted(unified)]  # 合并后的类别从0开始连续编号
+    mode = config.get('link', 'hard')
+
+    jobs = []
+    used_splits = set()
+    for cfg in config['datasets']:
+        ds = resolve_dataset(cfg, config_dir)
+        class_map = build_class_map(ds['names'], unified, ds['map'])
+        unmapped = [ds['names'][cid] for cid, c in class_map.items() if c is None]
+        if unmapped:
+            print(f"{ds['name']}: classes not in the unified list will be dropped: {unmapped}")
+        for split, images in ds['splits'].items():
+            used_splits.add(split)
+            img_dir = os.path.join(out, 'images', split)
+            label_dir = os.path.join(out, 'labels', split)
+            os.makedirs(img_dir, exist_ok=True)
+            os.makedirs(label_dir, exist_ok=True)
+            for img in images:
+                new_name = ds['name'] + '_' + os.path.basename(img)
+                jobs.append((img, os.path.join(img_dir, new_name), img2label_path(img),
+                             os.path.join(label_dir, os.path.splitext(new_name)[0] + '.txt'), class_map))
+        print(f"{ds['name']}: " + ', '.join(f"{s} {len(v)}" for s, v in ds['splits'].items()))
+
+    seen = set()
+    for job in jobs:
+        if job[1] in seen:
+            raise ValueError(f"file name collision after prefixing: {job[1]}")
+        seen.add(job[1])
+
+    def run(job):
+        img, img_dst, label, label_dst, class_map = job
+        link_file(img, img_dst, mode)
+        return remap_label(label, label_dst, class_map)
+
+    kept = dropped = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for k, d in tqdm(pool.map(run, jobs), total=len(jobs), desc='merge ', ncols=80, unit='img'):
+            kept += k
+            dropped += d
+
+    data = {'path': os.path.abspath(out)}
+    for split in SPLITS:
+        if split in used_splits:
+            data[split] = 'images/' + split
+    data['nc'] = len(unified)
+    data['names'] = unified
+    with open(os.path.join(out, 'data.yaml'), 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, sort_keys=False, default_flow_style=False, allow_unicode=True)
+    with open(os.path.join(out, 'classes.txt'), 'w', encoding='utf-8') as f:
+        for name in unified:
+            f.write(f"{name}\n")
+    print(f"image nums: {len(jobs)}")
+    print(f"bbox nums: {kept} (dropped {dropped})")
+    print(f"data.yaml saved to {os.path.join(out, 'data.yaml')}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="合并多个yolo数据集并统一类别")
+    parser.add_argument('config', type=str, help='合并配置文件，格式见脚本说明')
+    parser.add_argument('--workers', type=int, default=16, help='线程数')
+    opt = parser.parse_args()
+    merge_datasets(opt.config, opt.workers)
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.join(ROOT, 'dota_to_yolo') not in sys.path:
+    sys.path.append(os.path.join(ROOT, 'dota_to_yolo'))
+
+from obb_geometry import is_normalized
+
+"""
+离线图片预处理：把转换好的yolo数据集（images + labels）提前缩放到训练尺寸
+    - letterbox：长边缩放到imgsz，短边用114灰色居中填充（与yolov5 letterbox一致），标签同步换算
+    - 16位SAR图像可按百分位拉伸归一化到8位
+    - 统一转码为jpg/png
+结果按 源文件内容hash + 处理参数 缓存，相同imgsz的重复实验只需要解码一次
+"""
+
+IMG_FORMATS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+PAD_VALUE = 114
+
+
+def default_cache_dir():
+    """所有实验共用的缓存目录：$SAR_PREPROCESS_CACHE，否则为用户缓存目录下的 sar_preprocess"""
+    if os.environ.get('SAR_PREPROCESS_CACHE'):
+        return os.environ['SAR_PREPROCESS_CACHE']
+    base = os.environ.get('LOCALAPPDATA') if os.name == 'nt' else os.environ.get('XDG_CACHE_HOME')
+    return os.path.join(base or os.path.join(os.path.expanduser('~'), '.cache'), 'sar_preprocess')
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def params_key(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def normalize_16bit(arr, low=0.5, high=99.5):
+    """按百分位拉伸到0-255，SAR图像的动态范围很大，直接右移8位会几乎全黑"""
+    arr = arr.astype(np.float32)
+    lo, hi = np.percentile(arr, (low, high))
+    arr = (arr - lo) / max(hi - lo, 1e-6)
+    return (arr.clip(0, 1) * 255 + 0.5).astype(np.uint8)
+
+
+def load_image(path, sar16):
+    img = Image.open(path)
+    if img.mode in ('I;16', 'I;16B', 'I;16L', 'I', 'F'):
+        arr = np.array(img)
+        if sar16:
+            arr = normalize_16bit(arr)
+        else:
+            arr = (arr.astype(np.float32) / 256).clip(0, 255).astype(np.uint8)
+        img = Image.fromarray(arr)
+    elif img.mode not in ('L', 'RGB'):
+        img = img.convert('RGB')
+    return img
+
+
+def letterbox(img, imgsz, pad):
+    """返回 (处理后的图片, 缩放比例r, 左填充, 上填充)"""
+    w, h = img.size
+    r = imgsz / max(w, h)
+    nw, nh = max(1, round(w * r)), max(1, round(h * r))
+    if (nw, nh) != (w, h):
+        img = img.resize((nw, nh), Image.BILINEAR)
+    if not pad:
+        return img, r, 0, 0
+    left, top = (imgsz - nw) // 2, (imgsz - nh) // 2
+    fill = PAD_VALUE if img.mode == 'L' else (PAD_VALUE,) * 3
+    canvas = Image.new(img.mode, (imgsz, imgsz), fill)
+    canvas.paste(img, (left, top))
+    return canvas, r, left, top
+
+
+def process_one(args):
+    """
+    在子进程中处理一张图片，命中缓存时不解码
+    返回 (源图片路径, 缓存图片路径, 元信息)，元信息用于换算标签
+    内容相同的图片共用缓存，可能被多个进程同时写入：元信息和图片都先写临时文件再os.replace，
+    元信息在图片之前落地，读不出来的元信息按未命中处理
+    """
+    src, cache_dir, params = args
+    key = file_hash(src) + '_' + params_key(params)
+    sub = os.path.join(cache_dir, key[:2])
+    cached_img = os.path.join(sub, key + '.' + params['format'])
+    cached_meta = os.path.join(sub, key + '.json')
+    if os.path.exists(cached_img) and os.path.exists(cached_meta):
+        try:
+            with open(cached_meta, 'r', encoding='utf-8') as f:
+                return src, cached_img, json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    img = load_image(src, params['sar16'])
+    w, h = img.size
+    img, r, left, top = letterbox(img, params['imgsz'], params['pad'])
+    meta = {'src_w': w, 'src_h': h, 'w': img.size[0], 'h': img.size[1], 'r': r, 'left': left, 'top': top}
+
+    os.makedirs(sub, exist_ok=True)
+    tmp = cached_meta + '.tmp%d' % os.getpid()
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, cached_meta)
+    tmp = cached_img + '.tmp%d' % os.getpid()
+    if params['format'] == 'jpg':
+        img.save(tmp, format='JPEG', quality=params['quality'])
+    else:
+        img.save(tmp, format='PNG')
+    os.replace(tmp, cached_img)
+    return src, cached_img, meta
+
+
+def rescale_label_line(line, meta):
+    """
+    归一化坐标从原图换算到处理后的图片，支持 cls xc yc w h 与 cls x1 y1 ... x4 y4
+    像素坐标的xywhr旋转框（cls cx cy w h angle）与带conf的水平框列数相同，无法换算，直接报错
+    """
+    parts = line.split()
+    if len(parts) < 5:
+        return None
+    cls, vals = parts[0], list(map(float, parts[1:]))
+    coords = vals[:4] if len(vals) in (4, 5) else vals[:8]
+    if not is_normalized(coords):
+        raise ValueError(f"label coordinates are not normalized: '{line.strip()}' "
+                         "(xywhr labels are not supported, convert dota with --format poly)")
+    sx = meta['src_w'] * meta['r'] / meta['w']
+    sy = meta['src_h'] * meta['r'] / meta['h']
+    ox, oy = meta['left'] / meta['w'], meta['top'] / meta['h']
+    if len(vals) in (4, 5):      # hbb，可能带conf
+        xc, yc, bw, bh = vals[:4]
+        out = [xc * sx + ox, yc * sy + oy, bw * sx, bh * sy] + vals[4:]
+    else:                         # obb多边形
+        out = [v * sx + ox if i % 2 == 0 else v * sy + oy for i, v in enumerate(vals[:8])] + vals[8:]
+    return cls + ' ' + ' '.join('{:.6f}'.format(v) for v in out)
+
+
+def _place(src, dst):
+    """缓存到输出目录优先用硬链接，跨盘时退回复制"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def preprocess_dataset(img_dir, label_dir, out_dir, imgsz=640, pad=True, sar16=False,
+                       fmt='jpg', quality=95, cache_dir=None, workers=None):
+    cache_dir = cache_dir or default_cache_dir()
+    out_img_dir = os.path.join(out_dir, 'images')
+    out_label_dir = os.path.join(out_dir, 'labels')
+    os.makedirs(out_img_dir, exist_ok=True)
+    os.makedirs(out_label_dir, exist_ok=True)
+
+    params = {'imgsz': imgsz, 'pad': pad, 'sar16': sar16, 'format': fmt,
+              'quality': quality if fmt == 'jpg' else None}
+    files = sorted(os.path.join(img_dir, f) for f in os.listdir(img_dir) if f.lower().endswith(IMG_FORMATS))
+    jobs = [(f, cache_dir, params) for f in files]
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 8))
+
+    n_labels = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for src, cached, meta in tqdm(pool.map(process_one, jobs, chunksize=chunksize),
+                                      total=len(jobs), desc='preprocess ', ncols=80, unit='img'):
+            stem = os.path.splitext(os.path.basename(src))[0]
+            _place(cached, os.path.join(out_img_dir, stem + '.' + fmt))
+            label = os.path.join(label_dir, stem + '.txt') if label_dir else None
+            if label and os.path.exists(label):
+                with open(label, 'r', encoding='utf-8') as f:
+                    lines = [rescale_label_line(line, meta) for line in f if line.strip()]
+                with open(os.path.join(out_label_dir, stem + '.txt'), 'w', encoding='utf-8') as f:
+                    f.writelines(line + '\n' for line in lines if line)
+                n_labels += 1
+    print("image nums: {}".format(len(jobs)))
+    print("label nums: {}".format(n_labels))
+
+
+def main():
+    """
+    脚本说明：
+        在coco_to_yolo/divide.py、dota_to_yolo等转换脚本之后使用，对某一个划分（如train）做离线预处理
+        训练时把data.yaml中的路径指向输出目录，并使用相同的imgsz
+    """
+    parser = argparse.ArgumentParser(description="离线缩放/转码图片并同步换算yolo标签")
+    parser.add_argument('--images', type=str, required=True, help='图片目录')
+    parser.add_argument('--labels', type=str, default=None, help='yolo标签目录')
+    parser.add_argument('--out', type=str, required=True, help='输出目录，生成images和labels两个子目录')
+    parser.add_argument('--imgsz', type=int, default=640, help='训练尺寸')
+    parser.add_argument('--no-pad', action='store_true', help='只缩放不填充（标签保持不变）')
+    parser.add_argument('--sar16', action='store_true', help='16位图像按百分位拉伸到8位')
+    parser.add_argument('--format', type=str, default='jpg', choices=['jpg', 'png'], help='输出格式')
+    parser.add_argument('--quality', type=int, default=95, help='jpg质量')
+    parser.add_argument('--cache-dir', type=str, default=None, help='缓存目录，默认为所有输出目录共用的用户缓存目录（~/.cache/sar_preprocess）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认为cpu核数')
+    opt = parser.parse_args()
+    print(opt)
+    preprocess_dataset(opt.images, opt.labels, opt.out, opt.imgsz, not opt.no_pad, opt.sar16,
+                       opt.format, opt.quality, opt.cache_dir, opt.workers)
+
+
+if __name__ == '__main__':
+    main()
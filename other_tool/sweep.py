@@ -0,0 +1,246 @@
+import csv
+import itertools
+import math
+import os
+import queue
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import yaml
+
+from autotrain import run_training, terminate_process
+
+"""
+基于autotrain的超参数搜索：python autotrain.py --sweep sweep.yaml
+每组参数展开为一次train.py（以及可选的val.py）调用，按并发数同时运行，日志仍由run_training记录
+训练过程中从输出里解析每个epoch验证的 all 行（与output_to_csv相同的格式），
+明显落后于当前最好结果的试验会被提前终止，所有试验的结果汇总到一个csv里
+
+配置文件示例：
+    train: python train.py --data sar_data/HRSID/yolo_style/ships.yaml --epochs 100 --name {name}
+    val: python val.py --data sar_data/HRSID/yolo_style/ships.yaml --weights runs/train/{name}/weights/best.pt --task test
+    hyp: data/hyps/hyp.scratch-low.yaml   # 以 hyp. 开头的参数写入每个试验自己的hyp文件，通过 --hyp 传入
+    search: grid                          # grid 网格搜索 / random 随机搜索
+    trials: 8                             # random 时的试验次数
+    seed: 0
+    concurrency: 2                        # 同时运行的试验数
+    devices: [0, 1]                       # 每个并发槽位使用的设备，数量与concurrency相同，不给时都用train.py的默认设备
+    params:
+      img: [512, 640, 800]                # 普通参数作为 --img 640 追加到train命令
+      hyp.lr0: [0.001, 0.01]              # grid时为取值列表
+      # hyp.lr0: {low: 0.0001, high: 0.01, log: true}   # random时也可以给范围
+    early_stop:
+      metric: mAP50-95                    # P / R / mAP50 / mAP50-95
+      grace: 10                           # 前10个epoch不终止
+      ratio: 0.7                          # 低于同一epoch最好结果的70%时终止
+命令中可以用 {name}、{device} 和参数名（点号换成下划线，如 {hyp_lr0}）做占位符，
+给了devices但命令中没有 {device} 时自动追加 --device
+epoch编号取自train.py输出的进度行（如 12/99），训练结束后对best.pt的再次验证不参与提前终止的判断
+"""
+
+METRIC_COLUMNS = ['P', 'R', 'mAP50', 'mAP50-95']
+HEADER = ['Class', 'Images', 'Instances', 'P', 'R', 'mAP50', 'mAP50-95']
+EPOCH_RE = re.compile(r'^\s*(\d+)/(\d+)\s')
+# 出现这些输出后训练循环已经结束，之后的 all 行是对best.pt的最终验证
+FINAL_MARKERS = ('epochs completed in', 'Validating ')
+
+
+def parse_all_line(line):
+    """解析val输出中的 all 行，返回 {P, R, mAP50, mAP50-95}，不是则返回None"""
+    parts = re.split(r'\s+', line.strip())
+    if len(parts) != 7 or parts[0] != 'all':
+        return None
+    try:
+        return dict(zip(METRIC_COLUMNS, map(float, parts[3:])))
+    except ValueError:
+        return None
+
+
+def expand_params(config):
+    """根据search方式生成参数组合列表"""
+    params = config.get('params', {})
+    if config.get('search', 'grid') == 'grid':
+        keys = list(params)
+        values = [v if isinstance(v, list) else [v] for v in params.values()]
+        return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+    rng = random.Random(config.get('seed', 0))
+    trials = []
+    for _ in range(config.get('trials', 10)):
+        trial = {}
+        for key, spec in params.items():
+            if isinstance(spec, list):
+                trial[key] = rng.choice(spec)
+            elif isinstance(spec, dict):
+                low, high = spec['low'], spec['high']
+                if spec.get('log'):
+                    trial[key] = math.exp(rng.uniform(math.log(low), math.log(high)))
+                else:
+                    trial[key] = rng.uniform(low, high)
+                if isinstance(low, int) and isinstance(high, int) and not spec.get('log'):
+                    trial[key] = int(round(trial[key]))
+            else:
+                trial[key] = spec
+        trials.append(trial)
+    return trials
+
+
+def build_commands(config, trial, name, trial_dir, device=None):
+    """返回 (train命令, val命令或None)"""
+    # 没有指定设备时 {device} 替换为空字符串参数，train.py/val.py 按默认方式选择设备
+    fmt = {'name': name, 'device': '""' if device is None else device}
+    fmt.update({k.replace('.', '_'): v for k, v in trial.items()})
+    train = config['train'].format(**fmt)
+    hyp = {k[4:]: v for k, v in trial.items() if k.startswith('hyp.')}
+    if hyp:
+        base = {}
+        if config.get('hyp'):
+            with open(config['hyp'], 'r', encoding='utf-8') as f:
+                base = yaml.safe_load(f) or {}
+        base.update(hyp)
+        hyp_file = os.path.join(trial_dir, f'{name}_hyp.yaml')
+        with open(hyp_file, 'w', encoding='utf-8') as f:
+            yaml.dump(base, f, sort_keys=False)
+        train += f' --hyp {hyp_file}'
+    for key, value in trial.items():
+        if not key.startswith('hyp.') and '{' + key + '}' not in config['train']:
+            train += f' --{key} {value}'
+    val = config['val'].format(**fmt) if config.get('val') else None
+    if device is not None:
+        if '{device}' not in config['train']:
+            train += f' --device {device}'
+        if val and '{device}' not in config['val']:
+            val += f' --device {device}'
+    return train, val
+
+
+class EarlyStopper:
+    """记录每个epoch所有试验中的最好指标，落后太多的试验返回终止信号"""
+
+    def __init__(self, metric='mAP50-95', grace=10, ratio=0.7):
+        self.metric = metric
+        self.grace = grace
+        self.ratio = ratio
+        self.best_at_epoch = {}
+        self.lock = threading.Lock()
+
+    def tracker(self, state):
+        """返回给run_training使用的line_callback，state记录该试验的进度"""
+        def callback(line):
+            m = EPOCH_RE.match(line)
+            if m:
+                state['epoch'] = int(m.group(1))
+                return False
+            if any(marker in line for marker in FINAL_MARKERS):
+                state['final'] = True
+                return False
+            metrics = parse_all_line(line)
+            if metrics is None or state.get('final'):
+                return False
+            # 没有进度行时退回按 all 行计数
+            epoch = state['epoch'] if state.get('epoch') is not None else state['epochs']
+            if epoch < state['epochs']:  # 同一个epoch的 all 行只算一次
+                return False
+            state['epochs'] = epoch + 1
+            value = metrics[self.metric]
+            state['best'] = max(state['best'], value)
+            with self.lock:
+                best = max(self.best_at_epoch.get(epoch, 0.0), value)
+                self.best_at_epoch[epoch] = best
+            if epoch >= self.grace and state['best'] < self.ratio * best:
+                state['status'] = 'stopped'
+                return True
+            return False
+        return callback
+
+
+def run_sweep(config_file, root_dir, log_name=None):
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_dir = os.path.join(root_dir, "log", log_name or f"sweep_{timestamp}")
+    os.makedirs(log_dir, exist_ok=True)
+
+    trials = expand_params(config)
+    es = config.get('early_stop') or {}
+    stopper = EarlyStopper(es.get('metric', 'mAP50-95'), es.get('grace', 10), es.get('ratio', 0.7)) if es else None
+    total = len(trials)
+    concurrency = config.get('concurrency', 1)
+    print(f"共 {total} 组参数，并发数 {concurrency}，日志目录 {log_dir}")
+    devices = queue.Queue()
+    for device in config.get('devices') or [None] * concurrency:
+        devices.put(device)
+
+    # 每个试验都在单独的进程组中运行，终端的Ctrl+C到不了train.py，
+    # 这里记录正在运行的进程，中断时由主线程统一终止
+    live = set()
+    live_lock = threading.Lock()
+    stopping = threading.Event()
+
+    def on_start(process):
+        with live_lock:
+            live.add(process)
+        if stopping.is_set():
+            terminate_process(process)
+
+    def terminate_all():
+        stopping.set()
+        with live_lock:
+            processes = list(live)
+        for process in processes:
+            terminate_process(process)
+
+    def run_trial(i, trial):
+        if stopping.is_set():
+            return None
+        device = devices.get()
+        try:
+            return _run_trial(i, trial, device)
+        finally:
+            devices.put(device)
+
+    def _run_trial(i, trial, device):
+        name = f"sweep_{timestamp}_{i}"
+        train_cmd, val_cmd = build_commands(config, trial, name, log_dir, device)
+        state = {'epochs': 0, 'best': 0.0, 'status': 'ok', 'val': None, 'device': device}
+        callback = stopper.tracker(state) if stopper else None
+        if not run_training(train_cmd, f"{i}-train", total, log_dir, root_dir, callback, on_start):
+            if state['status'] != 'stopped':
+                state['status'] = 'interrupted' if stopping.is_set() else 'failed'
+            return name, trial, state
+        if val_cmd and not stopping.is_set():
+            def capture(line):
+                metrics = parse_all_line(line)
+                if metrics is not None:
+                    state['val'] = re.split(r'\s+', line.strip())
+                return False
+            if not run_training(val_cmd, f"{i}-val", total, log_dir, root_dir, capture, on_start):
+                state['status'] = 'val failed'
+        return name, trial, state
+
+    if config.get('devices') and len(config['devices']) < concurrency:
+        raise ValueError(f"devices ({len(config['devices'])}) must cover concurrency ({concurrency})")
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        results = list(pool.map(lambda args: run_trial(*args), enumerate(trials, 1)))
+    except KeyboardInterrupt:
+        print("\n收到中断，正在终止所有试验...")
+        raise
+    finally:
+        terminate_all()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    keys = list(config.get('params', {}))
+    out_csv = os.path.join(log_dir, 'sweep_results.csv')
+    with open(out_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name'] + keys + ['status', 'epochs', 'best_' + (stopper.metric if stopper else 'mAP50-95')] + HEADER)
+        for name, trial, state in results:
+            writer.writerow([name] + [trial.get(k) for k in keys] +
+                            [state['status'], state['epochs'], state['best']] + (state['val'] or [''] * len(HEADER)))
+    print(f"\n搜索完成，结果保存到 '{out_csv}'")
+    return out_csv
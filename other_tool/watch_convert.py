@@ -0,0 +1,339 @@
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import shutil
+import struct
+import sys
+import time
+
+import yaml
+
+"""
+监听标注目录，新标注一落地就只转换受影响的那几张图片
+    voc模式： Annotations/*.xml  ->  yolo标签（调用 voc_to_yolo/xml_to_yolo.f）
+    dota模式：Annotations/*.txt + PNGImages/*.png  ->  OUTPUT/{split}/images 与 labels
+             （调用 dota_to_yolo/trainval_to_train_and_val.convert_dota_to_yolo_obb）
+新建、修改、删除都会处理；出现新的类别名时追加到类别列表末尾（已有类别id不变），并更新classes.txt和data.yaml
+Linux下使用inotify，其他系统或NFS等inotify不可用的情况退回轮询（也可以用--poll强制轮询）
+同一个文件的一连串事件会在静默debounce秒后合并成一次转换
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _sub in ('voc_to_yolo', 'dota_to_yolo'):
+    if os.path.join(ROOT, _sub) not in sys.path:
+        sys.path.append(os.path.join(ROOT, _sub))
+
+
+class PollingWatcher:
+    """定时扫描目录，对比 (mtime, size) 找出新建/修改/删除的文件"""
+
+    def __init__(self, dirs, suffixes, interval=1.0):
+        self.dirs = dirs
+        self.suffixes = suffixes
+        self.interval = interval
+        self.overflow = False  # 轮询不会丢事件，与InotifyWatcher保持相同的接口
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snap = {}
+        for d in self.dirs:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.name.lower().endswith(self.suffixes) and e.is_file():
+                        st = e.stat()
+                        snap[e.path] = (st.st_mtime, st.st_size)
+        return snap
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snap = self._scan()
+        changed = {p for p in snap.keys() | self.snapshot.keys() if snap.get(p) != self.snapshot.get(p)}
+        self.snapshot = snap
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """通过ctypes直接调用Linux inotify，不需要额外的依赖"""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, dirs, suffixes):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.suffixes = suffixes
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_DELETE
+        # 事件队列溢出时内核丢弃了事件，置为True，由watch()做一次完整的同步
+        self.overflow = False
+        self.wds = {}
+        for d in dirs:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(d), mask)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {d}')
+            self.wds[wd] = d
+
+    def wait(self, timeout):
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        data = os.read(self.fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & self.IN_Q_OVERFLOW or wd == -1:
+                self.overflow = True
+                continue
+            if name.lower().endswith(self.suffixes) and wd in self.wds:
+                changed.add(os.path.join(self.wds[wd], name))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(dirs, suffixes, poll=False, interval=1.0):
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(dirs, suffixes)
+        except (OSError, AttributeError) as e:
+            print(f"inotify不可用（{e}），改为轮询")
+    return PollingWatcher(dirs, suffixes, interval)
+
+
+def write_classes(classes, classes_file):
+    with open(classes_file, 'w', encoding='utf-8') as f:
+        for name in classes:
+            f.write(f"{name}\n")
+
+
+def read_classes(classes_file, default=()):
+    if not os.path.exists(classes_file):
+        return list(default)
+    with open(classes_file, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def update_data_yaml(data_yaml, classes, splits=None):
+    data = {}
+    if os.path.exists(data_yaml):
+        with open(data_yaml, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+    for key, value in (splits or {}).items():
+        data.setdefault(key, value)
+    data['nc'] = len(classes)
+    data['names'] = list(classes)
+    with open(data_yaml, 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, sort_keys=False, default_flow_style=False, allow_unicode=True)
+
+
+class VocHandler:
+    """Annotations/*.xml -> labels/*.txt"""
+
+    def __init__(self, xml_dir, label_dir, classes_file=None, data_yaml=None):
+        import xml_to_yolo
+        self.xml_to_yolo = xml_to_yolo
+        self.xml_dir = xml_dir
+        self.label_dir = label_dir
+        self.classes_file = classes_file or os.path.join(os.path.dirname(os.path.normpath(label_dir)), 'classes.txt')
+        self.data_yaml = data_yaml
+        self.classes = read_classes(self.classes_file, xml_to_yolo.l)
+        os.makedirs(label_dir, exist_ok=True)
+        self.watch_dirs = [xml_dir]
+        self.suffixes = ('.xml',)
+
+    def stems(self):
+        return [n[:-4] for n in os.listdir(self.xml_dir) if n.endswith('.xml')]
+
+    def is_stale(self, stem):
+        label = os.path.join(self.label_dir, stem + '.txt')
+        return not os.path.exists(label) or \
+            os.path.getmtime(label) < os.path.getmtime(os.path.join(self.xml_dir, stem + '.xml'))
+
+    def handle(self, stem):
+        xml_path = os.path.join(self.xml_dir, stem + '.xml')
+        label = os.path.join(self.label_dir, stem + '.txt')
+        if not os.path.exists(xml_path):
+            if os.path.exists(label):
+                os.remove(label)
+            return 'deleted'
+        names = [o.find('name').text for o in self.xml_to_yolo.ET.parse(xml_path).getroot().findall('object')]
+        new = [n for n in dict.fromkeys(names) if n not in self.classes]
+        if new:
+            self.classes.extend(new)
+            write_classes(self.classes, self.classes_file)
+            if self.data_yaml:
+                update_data_yaml(self.data_yaml, self.classes)
+            print(f"new classes: {new}, classes.txt updated")
+        self.xml_to_yolo.f(stem, self.xml_dir, self.label_dir, self.classes)
+        return 'converted'
+
+
+class DotaHandler:
+    """
+    Annotations/*.txt + PNGImages/*.png -> OUTPUT/{split}/images 与 labels
+    已经在某个划分（如批量转换划分出的val）中的文件原地更新，只有新文件才放入split，避免train/val泄漏
+    """
+
+    SPLITS = ('train', 'val', 'test')
+
+    def __init__(self, images_dir, ann_dir, output_dir, split='train'):
+        import trainval_to_train_and_val as dota
+        from pathlib import Path
+        self.dota = dota
+        self.images_dir = Path(images_dir)
+        self.ann_dir = Path(ann_dir)
+        self.output_dir = Path(output_dir)
+        self.img_out = self.output_dir / split / 'images'
+        self.label_out = self.output_dir / split / 'labels'
+        self.img_out.mkdir(parents=True, exist_ok=True)
+        self.label_out.mkdir(parents=True, exist_ok=True)
+        self.classes_file = self.output_dir / 'classes.txt'
+        self.data_yaml = self.output_dir / 'data.yaml'
+        self.split = split
+        self.classes = read_classes(self.classes_file)
+        self.watch_dirs = [str(self.images_dir), str(self.ann_dir)]
+        self.suffixes = ('.txt', '.png')
+
+    def stems(self):
+        return [p.stem for p in self.images_dir.glob('*.png')]
+
+    def locate(self, stem):
+        """返回已有该文件标签的划分，都没有时返回新文件使用的split"""
+        for split in (self.split,) + tuple(s for s in self.SPLITS if s != self.split):
+            if (self.output_dir / split / 'labels' / (stem + '.txt')).exists():
+                return split
+        return self.split
+
+    def is_stale(self, stem):
+        label = self.output_dir / self.locate(stem) / 'labels' / (stem + '.txt')
+        if not label.exists():
+            return True
+        ann = self.ann_dir / (stem + '.txt')
+        src = [self.images_dir / (stem + '.png')] + ([ann] if ann.exists() else [])
+        return label.stat().st_mtime < max(p.stat().st_mtime for p in src)
+
+    def _update_classes(self, ann_path):
+        new = []
+        with open(ann_path, 'r') as f:
+            for line in f:
+                parts = line.strip().split()
+                if len(parts) >= 9 and parts[8] not in self.classes and parts[8] not in new:
+                    new.append(parts[8])
+        if new:
+            self.classes.extend(new)
+            write_classes(self.classes, self.classes_file)
+            update_data_yaml(self.data_yaml, self.classes, {self.split: str(self.img_out.resolve())})
+            print(f"new classes: {new}, classes.txt and data.yaml updated")
+
+    def handle(self, stem):
+        img_path = self.images_dir / (stem + '.png')
+        ann_path = self.ann_dir / (stem + '.txt')
+        split_dir = self.output_dir / self.locate(stem)
+        dest_img = split_dir / 'images' / img_path.name
+        dest_label = split_dir / 'labels' / (stem + '.txt')
+        if not img_path.exists():
+            for p in (dest_img, dest_label):
+                if p.exists():
+                    p.unlink()
+            return 'deleted'
+        if ann_path.exists():
+            self._update_classes(ann_path)
+        width, height = self.dota.get_image_dimensions(img_path)
+        lines = self.dota.convert_dota_to_yolo_obb(ann_path, width, height,
+                                                   {n: i for i, n in enumerate(self.classes)})
+        shutil.copy2(img_path, dest_img)
+        with open(dest_label, 'w') as f_out:
+            for line in lines:
+                f_out.write(line + "\n")
+        return 'converted'
+
+
+def resync(handler, reason):
+    """转换所有过期的文件，用于启动时和inotify事件队列溢出之后"""
+    stale = [s for s in handler.stems() if handler.is_stale(s)]
+    print(f"{reason}: {len(stale)} items to convert")
+    for stem in stale:
+        _safe_handle(handler, stem)
+
+
+def watch(handler, poll=False, interval=1.0, debounce=2.0, initial_sync=True):
+    if initial_sync:
+        resync(handler, "initial sync")
+
+    watcher = make_watcher(handler.watch_dirs, handler.suffixes, poll, interval)
+    print(f"watching {handler.watch_dirs} with {type(watcher).__name__}, Ctrl+C to stop")
+    pending = {}
+    try:
+        while True:
+            for path in watcher.wait(timeout=min(interval, debounce)):
+                pending[os.path.splitext(os.path.basename(path))[0]] = time.monotonic()
+            if watcher.overflow:
+                watcher.overflow = False
+                print("warning: inotify event queue overflowed, some events were lost")
+                resync(handler, "resync")
+            now = time.monotonic()
+            ready = [stem for stem, t in pending.items() if now - t >= debounce]
+            for stem in ready:
+                del pending[stem]
+                _safe_handle(handler, stem)
+    except KeyboardInterrupt:
+        print("stopped")
+    finally:
+        watcher.close()
+
+
+def _safe_handle(handler, stem):
+    try:
+        result = handler.handle(stem)
+        print(f"{time.strftime('%H:%M:%S')} {stem}: {result}")
+    except Exception as e:
+        print(f"{time.strftime('%H:%M:%S')} {stem}: failed ({e})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监听标注目录并增量转换为yolo格式")
+    parser.add_argument('mode', choices=['voc', 'dota'], help='标注格式')
+    parser.add_argument('--ann-dir', type=str, required=True, help='标注目录（voc为xml，dota为txt）')
+    parser.add_argument('--label-dir', type=str, default=None, help='voc：yolo标签输出目录')
+    parser.add_argument('--classes', type=str, default=None, help='voc：classes.txt路径，默认在label-dir的上一级')
+    parser.add_argument('--data-yaml', type=str, default=None, help='voc：出现新类别时同步更新的data.yaml')
+    parser.add_argument('--images-dir', type=str, default=None, help='dota：PNGImages目录')
+    parser.add_argument('--output-dir', type=str, default=None, help='dota：yolo数据集输出目录')
+    parser.add_argument('--split', type=str, default='train', help='dota：新图片放入的划分')
+    parser.add_argument('--poll', action='store_true', help='强制使用轮询（NFS等网络盘）')
+    parser.add_argument('--interval', type=float, default=1.0, help='轮询间隔（秒）')
+    parser.add_argument('--debounce', type=float, default=2.0, help='文件静默多少秒后再转换')
+    parser.add_argument('--no-initial-sync', action='store_true', help='启动时不补转换已过期的文件')
+    args = parser.parse_args()
+
+    if args.mode == 'voc':
+        if not args.label_dir:
+            parser.error('voc模式需要 --label-dir')
+        handler = VocHandler(args.ann_dir, args.label_dir, args.classes, args.data_yaml)
+    else:
+        if not args.images_dir or not args.output_dir:
+            parser.error('dota模式需要 --images-dir 和 --output-dir')
+        handler = DotaHandler(args.images_dir, args.ann_dir, args.output_dir, args.split)
+    watch(handler, args.poll, args.interval, args.debounce, not args.no_initial_sync)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.join(ROOT, 'dota_to_yolo') not in sys.path:
+    sys.path.append(os.path.join(ROOT, 'dota_to_yolo'))
+
+from obb_geometry import is_normalized, poly_iou
+
+"""
+不启动模型，直接用保存下来的yolo标签和预测结果计算 P / R / mAP50 / mAP50-95
+支持两种标签格式（按列数自动识别）：
+    水平框 HBB: cls xc yc w h [conf]
+    旋转框 OBB: cls x1 y1 x2 y2 x3 y3 x4 y4 [conf]   (convert_dota_to_yolo_obb 输出的格式)
+预测结果来自 val.py --save-txt --save-conf
+坐标必须是归一化的，dota转换时 --format xywhr 输出的像素坐标旋转框不支持，会被跳过并给出警告
+匹配与AP的计算方式与yolov5 val.py保持一致，因此结果可以和val.py的表格直接对比
+"""
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+# numpy 2.0 起 trapz 更名为 trapezoid
+_trapz = getattr(np, 'trapezoid', None) or np.trapz
+HEADER = ['Class', 'Images', 'Instances', 'P', 'R', 'mAP50', 'mAP50-95']
+
+
+def read_label_file(path, with_conf):
+    """读取一个yolo txt文件，返回 (cls[N], boxes[N, 4或8], conf[N])"""
+    rows = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = [line.split() for line in f if line.strip()]
+    if not rows:
+        return np.zeros(0), np.zeros((0, 4)), np.zeros(0)
+    n = len(rows[0]) - 1
+    kept = [r for r in rows if len(r) == n + 1]
+    if len(kept) != len(rows):
+        print(f"warning: {path}: {len(rows) - len(kept)} lines with a different number of columns "
+              f"than the first line ({n + 1}) were skipped")
+    arr = np.array(kept, dtype=np.float64)
+    if with_conf and n in (5, 9):
+        cls, boxes, conf = arr[:, 0], arr[:, 1:-1], arr[:, -1]
+    else:
+        cls, boxes, conf = arr[:, 0], arr[:, 1:], np.ones(len(arr))
+    if boxes.shape[1] not in (4, 8):
+        raise ValueError(f"{path}: unsupported label format with {n + 1} columns")
+    if not is_normalized(boxes):
+        raise ValueError(f"{path}: coordinates are not normalized (xywhr pixel labels are not supported)")
+    return cls, boxes, conf
+
+
+def box_iou(a, b):
+    """水平框iou，a[N,4] b[M,4] 均为 xc yc w h，返回 [N,M]"""
+    a1, a2 = a[:, None, :2] - a[:, None, 2:] / 2, a[:, None, :2] + a[:, None, 2:] / 2
+    b1, b2 = b[None, :, :2] - b[None, :, 2:] / 2, b[None, :, :2] + b[None, :, 2:] / 2
+    inter = (np.minimum(a2, b2) - np.maximum(a1, b1)).clip(0).prod(2)
+    union = a[:, None, 2:].prod(2) + b[None, :, 2:].prod(2) - inter
+    return inter / np.maximum(union, 1e-12)
+
+
+def match_predictions(pred_cls, gt_cls, iou, iouv=IOU_THRESHOLDS):
+    """与yolov5 process_batch一致的贪心匹配，返回 correct[npred, len(iouv)]"""
+    correct = np.zeros((len(pred_cls), len(iouv)), dtype=bool)
+    iou = iou * (gt_cls[:, None] == pred_cls[None, :])
+    for i, thr in enumerate(iouv):
+        g, p = np.nonzero(iou >= thr)
+        if not len(g):
+            continue
+        matches = np.stack([g, p, iou[g, p]], 1)
+        if len(matches) > 1:
+            matches = matches[matches[:, 2].argsort()[::-1]]
+            matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+            matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+        correct[matches[:, 1].astype(int), i] = True
+    return correct
+
+
+def evaluate_image(args):
+    """
+    单张图片: 返回 (correct, conf, pred_cls, gt_cls)，在进程池中执行
+    标签格式有问题时打印警告并返回None，跳过这张图片而不是中断整个评估
+    """
+    gt_path, pred_path = args
+    try:
+        return _evaluate_image(gt_path, pred_path)
+    except ValueError as e:
+        print(f"warning: skipped {os.path.basename(gt_path)}: {e}")
+        return None
+
+
+def _evaluate_image(gt_path, pred_path):
+    gt_cls, gt_box, _ = read_label_file(gt_path, with_conf=False)
+    pred_cls, pred_box, conf = read_label_file(pred_path, with_conf=True)
+    if len(pred_cls) and len(gt_cls):
+        if gt_box.shape[1] != pred_box.shape[1]:
+            raise ValueError(f"box format mismatch between {gt_path} and {pred_path}")
+        iou = poly_iou(gt_box, pred_box) if gt_box.shape[1] == 8 else box_iou(gt_box, pred_box)
+        correct = match_predictions(pred_cls, gt_cls, iou)
+    else:
+        correct = np.zeros((len(pred_cls), len(IOU_THRESHOLDS)), dtype=bool)
+    return correct, conf, pred_cls, gt_cls
+
+
+def compute_ap(recall, precision):
+    """101点插值的AP（COCO方式），与yolov5 metrics.compute_ap一致"""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return _trapz(np.interp(x, mrec, mpre), x)
+
+
+def smooth(y, f=0.05):
+    """box filter，与yolov5 metrics.smooth一致"""
+    nf = round(len(y) * f * 2) // 2 + 1
+    p = np.ones(nf // 2)
+    yp = np.concatenate((p * y[0], y, p * y[-1]), 0)
+    return np.convolve(yp, np.ones(nf) / nf, mode='valid')
+
+
+def ap_per_class(tp, conf, pred_cls, target_cls, eps=1e-16):
+    """返回 (classes, p, r, ap[nc,10])，P/R取平滑后F1最大的置信度处，与yolov5一致"""
+    i = np.argsort(-conf)
+    tp, conf, pred_cls = tp[i], conf[i], pred_cls[i]
+    unique_classes, nt = np.unique(target_cls, return_counts=True)
+    nc = len(unique_classes)
+
+    px = np.linspace(0, 1, 1000)
+    ap = np.zeros((nc, tp.shape[1]))
+    p, r = np.zeros((nc, 1000)), np.zeros((nc, 1000))
+    for ci, c in enumerate(unique_classes):
+        i = pred_cls == c
+        n_p = i.sum()
+        if n_p == 0:
+            continue
+        fpc = (1 - tp[i]).cumsum(0)
+        tpc = tp[i].cumsum(0)
+        recall = tpc / (nt[ci] + eps)
+        r[ci] = np.interp(-px, -conf[i], recall[:, 0], left=0)
+        precision = tpc / (tpc + fpc)
+        p[ci] = np.interp(-px, -conf[i], precision[:, 0], left=1)
+        for j in range(tp.shape[1]):
+            ap[ci, j] = compute_ap(recall[:, j], precision[:, j])
+
+    f1 = 2 * p * r / (p + r + eps)
+    best = smooth(f1.mean(0), 0.1).argmax() if nc else 0
+    return unique_classes.astype(int), p[:, best], r[:, best], ap
+
+
+def evaluate(gt_dir, pred_dir, names=None, workers=None):
+    """
+    计算每个类别以及全部类别的 P R mAP50 mAP50-95
+    返回与 output_to_csv 相同列的行列表，第一行为 all
+    只有预测结果没有真值文件的图片（背景图）也参与计算，其中的预测全部算作误检
+    """
+    files = set()
+    for d in (gt_dir, pred_dir):
+        files.update(f for f in os.listdir(d) if f.endswith('.txt') and f != 'classes.txt')
+    jobs = [(os.path.join(gt_dir, f), os.path.join(pred_dir, f)) for f in sorted(files)]
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stats = [s for s in pool.map(evaluate_image, jobs, chunksize=chunksize) if s is not None]
+    if len(stats) != len(jobs):
+        print(f"warning: {len(jobs) - len(stats)} images were skipped")
+
+    correct, conf, pred_cls, gt_cls = (np.concatenate(x, 0) for x in zip(*stats)) if stats else \
+        (np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool), np.zeros(0), np.zeros(0), np.zeros(0))
+    classes, p, r, ap = ap_per_class(correct.astype(np.float64), conf, pred_cls, gt_cls)
+    ap50, ap = ap[:, 0], ap.mean(1)
+    images_per_class = {int(c): sum(int((s[3] == c).any()) for s in stats) for c in classes}
+
+    rows = [['all', len(stats), len(gt_cls), f'{p.mean() if len(p) else 0:.3g}', f'{r.mean() if len(r) else 0:.3g}',
+             f'{ap50.mean() if len(ap50) else 0:.3g}', f'{ap.mean() if len(ap) else 0:.3g}']]
+    for ci, c in enumerate(classes):
+        name = names[c] if names and c < len(names) else str(c)
+        rows.append([name, images_per_class[c], int((gt_cls == c).sum()),
+                     f'{p[ci]:.3g}', f'{r[ci]:.3g}', f'{ap50[ci]:.3g}', f'{ap[ci]:.3g}'])
+    return rows
+
+
+def load_names(classes_file):
+    if not classes_file or not os.path.exists(classes_file):
+        return None
+    with open(classes_file, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="根据保存的yolo标签和预测结果计算mAP")
+    parser.add_argument('--gt', type=str, required=True, help='真值标签目录')
+    parser.add_argument('--pred', type=str, required=True, help='预测结果目录（val.py --save-txt --save-conf）')
+    parser.add_argument('--classes', type=str, default=None, help='classes.txt，用于显示类别名')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认为cpu核数')
+    parser.add_argument('--csv', type=str, default=None, help='结果保存为csv（与output_to_csv格式相同）')
+    args = parser.parse_args()
+
+    rows = evaluate(args.gt, args.pred, load_names(args.classes), args.workers)
+    print(('{:>20}' + '{:>11}' * 6).format(*HEADER))
+    for row in rows:
+        print(('{:>20}' + '{:>11}' * 6).format(*map(str, row)))
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(HEADER)
+            writer.writerows(rows)
+        print(f"数据已成功保存到 '{args.csv}'")
+
+
+if __name__ == '__main__':
+    main()
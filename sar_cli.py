@@ -0,0 +1,203 @@
+import argparse
+import os
+import sys
+
+"""
+所有工具的统一入口，例如：
+    python sar_cli.py convert coco -jp annotations/train_test2017.json -s yolo_file/train_test
+    python sar_cli.py convert voc --xml-dir MSAR/Annotations --label-dir MSAR/yolo_style/labels
+    python sar_cli.py convert dota --src SL-TRAINVAL/trainval --out sl_yolo_dataset
+    python sar_cli.py coco-split -jp annotations/train_test2017.json -s annotations/split --method stratified
+    python sar_cli.py split --images yolo_file/images --labels yolo_file/train_test --out yolo_file/Dataset
+    python sar_cli.py remap labels/val --map 1:0
+    python sar_cli.py train --log_name exp1
+    python sar_cli.py metrics --gt labels/test --pred runs/val/exp/labels
+启动时只导入标准库中的argparse/os/sys，子命令用到的pycocotools、PIL、numpy、yaml等
+只在该子命令真正执行时才导入，`python sar_cli.py startup` 可以测量冷启动耗时
+"""
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STARTUP_BUDGET = 0.15  # 秒，`sar_cli.py --help` 冷启动的耗时上限
+
+# 直接转发参数给原脚本的子命令: 名称 -> (脚本路径, 说明)
+SCRIPTS = {
+    'to-coco': ('coco_to_yolo/yolo_to_coco.py', 'yolo标签/预测结果转coco json'),
+    'coco-split': ('coco_to_yolo/coco_split.py', '一次读取coco json写出各划分的json和划分索引'),
+    'metrics': ('other_tool/yolo_map.py', '根据保存的标签和预测结果计算mAP'),
+    'train': ('other_tool/autotrain.py', '按顺序执行训练命令并记录日志'),
+    'merge': ('other_tool/merge_datasets.py', '合并多个yolo数据集'),
+    'dedup': ('other_tool/dedup_index.py', '重复图片与数据泄漏检测'),
+    'preprocess': ('other_tool/preprocess_images.py', '离线缩放预处理'),
+    'watch': ('other_tool/watch_convert.py', '监听标注目录增量转换'),
+}
+
+
+def _use_dir(sub):
+    """把工具所在目录加入sys.path，脚本之间按同目录的方式互相导入"""
+    path = os.path.join(ROOT, sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def run_script(rel_path, argv):
+    """
+    执行原脚本，sys.argv 替换为转发的参数
+    有main()的脚本按模块导入后调用（使用进程池的脚本在Windows的spawn方式下需要能按模块名导入），
+    否则以 __main__ 方式执行
+    """
+    import importlib
+    import runpy
+    path = os.path.join(ROOT, rel_path)
+    _use_dir(os.path.dirname(rel_path))
+    sys.argv = [path] + list(argv)
+    module = importlib.import_module(os.path.splitext(os.path.basename(rel_path))[0])
+    if hasattr(module, 'main'):
+        module.main()
+    else:
+        runpy.run_path(path, run_name='__main__')
+
+
+def cmd_convert_coco(args):
+    run_script('coco_to_yolo/coco_to_yolo.py', args.rest)
+
+
+def cmd_convert_voc(args):
+    _use_dir('voc_to_yolo')
+    import glob
+    import xml_to_yolo
+    os.makedirs(args.label_dir, exist_ok=True)
+    classes = args.classes.split(',') if args.classes else xml_to_yolo.l
+    for xml_path in glob.glob(os.path.join(args.xml_dir, '*.xml')):
+        xml_to_yolo.f(os.path.basename(xml_path)[:-4], args.xml_dir, args.label_dir, classes)
+
+
+def _configure_dota(module, src, out):
+    """DOTA脚本的路径是模块级常量，这里按命令行参数重新设置后再调用main()"""
+    from pathlib import Path
+    src, out = Path(src), Path(out)
+    for name, value in {
+        'ORIGINAL_DATASET_BASE_DIR': src, 'ORIGINAL_TEST_BASE_DIR': src,
+        'ORIGINAL_IMAGES_DIR': src / 'PNGImages', 'ORIGINAL_TEST_IMAGES_DIR': src / 'PNGImages',
+        'ORIGINAL_ANNOTATIONS_DIR': src / 'Annotations', 'ORIGINAL_TEST_ANNOTATIONS_DIR': src / 'Annotations',
+        'OUTPUT_YOLO_DATASET_DIR': out,
+        'YOLO_TRAIN_DIR': out / 'train', 'YOLO_VAL_DIR': out / 'val', 'YOLO_TEST_DIR': out / 'test',
+        'YOLO_TRAIN_IMAGES_DIR': out / 'train' / 'images', 'YOLO_TRAIN_LABELS_DIR': out / 'train' / 'labels',
+        'YOLO_VAL_IMAGES_DIR': out / 'val' / 'images', 'YOLO_VAL_LABELS_DIR': out / 'val' / 'labels',
+        'YOLO_TEST_IMAGES_DIR': out / 'test' / 'images', 'YOLO_TEST_LABELS_DIR': out / 'test' / 'labels',
+        'CLASSES_FILE_PATH': out / 'classes.txt', 'DATA_YAML_PATH': out / 'data.yaml',
+    }.items():
+        if hasattr(module, name):
+            setattr(module, name, value)
+
+
+def cmd_convert_dota(args):
+    _use_dir('dota_to_yolo')
+    if args.test:
+        import test_convert as module
+    else:
+        import trainval_to_train_and_val as module
+        module.TRAIN_RATIO = args.train_ratio
+        module.GROUPS_FILE = args.groups
+    _configure_dota(module, args.src, args.out)
+    module.OUTPUT_FORMAT = args.format
+    module.PIPELINE_WORKERS = args.workers
+    module.main()
+
+
+def cmd_split(args):
+    _use_dir('coco_to_yolo')
+    import divide
+    divide.split_img(args.images, args.labels, args.ratios, args.groups, args.out, args.index)
+
+
+def cmd_remap(args):
+    _use_dir('coco_to_yolo')
+    import change_1_to_0
+    mapping = {}
+    for item in args.mapping:
+        src, dst = item.split(':')
+        mapping[int(src)] = int(dst)
+    for folder in args.folders:
+        change_1_to_0.remap_txt_files(folder, mapping)
+
+
+def cmd_startup(args):
+    """多次冷启动 `sar_cli.py --help`，取中位数与预算比较"""
+    import subprocess
+    import time
+    times = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--help'],
+                       stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - t0)
+    median = sorted(times)[len(times) // 2]
+    print(f"cold start median: {median * 1000:.1f} ms over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+    if median > args.budget:
+        sys.exit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='sar_cli.py', description="SAR数据集转换工具统一入口")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    convert = sub.add_parser('convert', help='coco/voc/dota 转 yolo')
+    fmt = convert.add_subparsers(dest='format_', required=True)
+
+    p = fmt.add_parser('coco', help='coco json 转 yolo（参数同coco_to_yolo.py）', add_help=False)
+    p.set_defaults(func=cmd_convert_coco, forward=True)
+
+    p = fmt.add_parser('voc', help='voc xml 转 yolo')
+    p.add_argument('--xml-dir', required=True, help='xml标注目录')
+    p.add_argument('--label-dir', required=True, help='yolo标签输出目录')
+    p.add_argument('--classes', default=None, help='逗号分隔的类别列表，默认使用xml_to_yolo.l')
+    p.set_defaults(func=cmd_convert_voc)
+
+    p = fmt.add_parser('dota', help='dota 转 yolo obb')
+    p.add_argument('--src', required=True, help='包含PNGImages和Annotations的目录')
+    p.add_argument('--out', required=True, help='yolo数据集输出目录')
+    p.add_argument('--test', action='store_true', help='转换测试集（需要已有classes.txt）')
+    p.add_argument('--train-ratio', type=float, default=0.9)
+    p.add_argument('--groups', default=None, help='dedup生成的重复组文件')
+    p.add_argument('--format', default='poly', choices=['poly', 'xywhr'],
+                   help='xywhr为像素坐标，preprocess/metrics/to-coco不能读取')
+    p.add_argument('--workers', type=int, default=8, help='流水线线程数，0为顺序执行')
+    p.set_defaults(func=cmd_convert_dota)
+
+    p = sub.add_parser('split', help='划分train/val/test（divide.py）')
+    p.add_argument('--images', required=True, help='图片目录')
+    p.add_argument('--labels', required=True, help='标签目录')
+    p.add_argument('--out', required=True, help='输出的Dataset目录')
+    p.add_argument('--ratios', type=float, nargs=3, default=[0.7, 0.2, 0.1], help='train val test比例')
+    p.add_argument('--groups', default=None, help='dedup生成的重复组文件')
+    p.add_argument('--index', default=None, help='coco-split生成的划分索引，给出时按索引划分')
+    p.set_defaults(func=cmd_split)
+
+    p = sub.add_parser('remap', help='修改标签类别id（change_1_to_0.py）')
+    p.add_argument('folders', nargs='+', help='标签目录')
+    p.add_argument('--map', dest='mapping', nargs='+', default=['1:0'], help='源id:目标id，默认 1:0')
+    p.set_defaults(func=cmd_remap)
+
+    for name, (path, help_text) in SCRIPTS.items():
+        p = sub.add_parser(name, help=help_text, add_help=False)
+        p.set_defaults(func=lambda args, path=path: run_script(path, args.rest), forward=True)
+
+    p = sub.add_parser('startup', help='测量冷启动耗时')
+    p.add_argument('--runs', type=int, default=10)
+    p.add_argument('--budget', type=float, default=STARTUP_BUDGET, help='预算（秒）')
+    p.set_defaults(func=cmd_startup)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    # 转发给原脚本的子命令不在这里解析参数，剩余参数原样交给脚本（包括 --help）
+    args, rest = parser.parse_known_args(argv)
+    if rest and not getattr(args, 'forward', False):
+        parser.error('unrecognized arguments: ' + ' '.join(rest))
+    args.rest = rest
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
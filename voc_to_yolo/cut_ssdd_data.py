@@ -1,14 +1,19 @@
 # 该脚本文件需要修改第11-12行，设置train、val、test的切分的比率
 # 该脚本用于分割SSDD数据集，同时也可用于MSAR数据集等
 import os
-import random
+import sys
 import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'other_tool'))
+from dup_groups import load_groups, sample_by_group
  
 parser = argparse.ArgumentParser()
 parser.add_argument('--xml_path', default='./sar_data/MSAR/Annotations', type=str, help='input xml label path')
 parser.add_argument('--txt_path', default='./sar_data/MSAR/yolo_style', type=str, help='output txt label path')
+parser.add_argument('--groups', default=None, type=str, help='other_tool/dedup_index.py生成的重复组文件，同一组划分到同一个集合')
 opt = parser.parse_args()
- 
+
+
 trainval_percent = 0.9
 train_percent = 0.7  #这里的train_percent 是指占trainval_percent中的
 xmlfilepath = opt.xml_path
@@ -17,12 +22,14 @@ total_xml = os.listdir(xmlfilepath)
 if not os.path.exists(txtsavepath):
     os.makedirs(txtsavepath)
  
+groups = load_groups(opt.groups) if opt.groups else {}
+
 num = len(total_xml)
 list_index = range(num)
 tv = int(num * trainval_percent)
 tr = int(tv * train_percent)
-trainval = random.sample(list_index, tv)
-train = random.sample(trainval, tr)
+trainval = sample_by_group(list_index, tv, groups, key=lambda i: total_xml[i][:-4])
+train = sample_by_group(trainval, tr, groups, key=lambda i: total_xml[i][:-4])
  
 file_trainval = open(txtsavepath + '/trainval.txt', 'w')
 file_test = open(txtsavepath + '/test.txt', 'w')
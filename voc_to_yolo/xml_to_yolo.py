@@ -4,6 +4,7 @@ import glob
 import xml.etree.ElementTree as ET
 
 xml_file = r'D:\study\yolov5-master_with_data\yolov5-master\sar_data\MSAR\Annotations'
+txt_file = r'D:\study\yolov5-master_with_data\yolov5-master\sar_data\MSAR\yolo_style\labels'
 
 # 支持中文的类别列表
 l = ['飞机', '油罐', '桥梁', '船只','W']
@@ -21,9 +22,9 @@ def convert(box, dw, dh):
 
     return x, y, w, h
 
-def f(name_id):
-    xml_path = os.path.join(xml_file, f'{name_id}.xml')
-    txt_path = os.path.join(r'D:\study\yolov5-master_with_data\yolov5-master\sar_data\MSAR\yolo_style\labels', f'{name_id}.txt')
+def f(name_id, xml_dir=xml_file, txt_dir=txt_file, classes=l):
+    xml_path = os.path.join(xml_dir, f'{name_id}.xml')
+    txt_path = os.path.join(txt_dir, f'{name_id}.txt')
     
     with open(xml_path, 'r', encoding='utf-8') as xml_o, open(txt_path, 'w', encoding='utf-8') as txt_o:
         pares = ET.parse(xml_o)
@@ -34,7 +35,7 @@ def f(name_id):
         dh = int(size.find('height').text)
 
         for obj in objects:
-            c = l.index(obj.find('name').text)
+            c = classes.index(obj.find('name').text)
             bnd = obj.find('bndbox')
 
             b = (float(bnd.find('xmin').text), float(bnd.find('ymin').text),
@@ -45,7 +46,8 @@ def f(name_id):
             write_t = "{} {:.5f} {:.5f} {:.5f} {:.5f}\n".format(c, x, y, w, h)
             txt_o.write(write_t)
 
-name = glob.glob(os.path.join(xml_file, "*.xml"))
-for i in name:
-    name_id = os.path.basename(i)[:-4]
-    f(name_id)
+if __name__ == '__main__':
+    name = glob.glob(os.path.join(xml_file, "*.xml"))
+    for i in name:
+        name_id = os.path.basename(i)[:-4]
+        f(name_id)